@@ -0,0 +1,252 @@
+'''Benchmark suite for the SVG-to-command pipeline and the survey analysis.
+
+    python benchmark.py                      # run and compare against the saved baseline
+    python benchmark.py --update-baseline    # run and save the results as the new baseline
+    python benchmark.py --sizes 10000 100000 1000000   # scaled-up synthetic SVGs (slow)
+
+Exits with status 1 if any benchmark is slower than its baseline by more than --tolerance.
+Every timing is the median of --repeats unprofiled runs, and whatever looks
+regressed is measured a second time before it counts.
+'''
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from svgpathtools import svg2paths2
+from svg_to_xy import (calculate_standardized_metrics, svg_to_simplified_points_list, split_svg_paths,
+                       _sample_raw_points_for_path, simplify_polyline_rdp, normalize_and_scale_points,
+                       add_pen_down_none_tuples, SAMPLES_PER_SEGMENT, RDP_TOLERANCE)
+from command_generator import generate_commands, generate_commands_file, read_commands_file, write_lines_atomic
+from joint_densify import densify_for_joint_interpolation
+from main import generate_robot_command_from_svg
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+SVG_DIRS = [BASE_DIR / "data" / "svg_files", BASE_DIR / "data" / "svg_storage"]
+XY_FILE_STORAGE_DIR = BASE_DIR / "data" / "xy_file_storage"
+SURVEY_FILE = BASE_DIR / "data" / "Creativity Project_November 12, 2025_13.09.csv"
+BASELINE_FILE = BASE_DIR / "data" / "benchmark_baseline.json"
+
+L1, L2 = 13, 12.5
+MARGIN = 2
+REPEATS = 5
+SYNTHETIC_SIZES = (10_000,)       # segments per synthetic SVG; pass --sizes for 100k / 1M
+SEGMENTS_PER_STROKE = 50
+TOLERANCE = 0.25                  # allowed slowdown vs baseline (25%)
+NOISE_FLOOR = 0.005               # seconds; smaller absolute differences never fail
+
+
+def time_call(func, repeats=REPEATS):
+    """
+    Median wall time of func() over repeats runs, with its printing
+    silenced. Returns (seconds, last result).
+    """
+    times = []
+    result = None
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def write_synthetic_svg(path, segments, seed=0):
+    """
+    Writes a reproducible SVG with the given number of line and cubic
+    segments, split into strokes of SEGMENTS_PER_STROKE segments.
+    """
+    rng = random.Random(seed)
+    parts = []
+    for stroke_start in range(0, segments, SEGMENTS_PER_STROKE):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        d = [f"M{x:.2f} {y:.2f}"]
+        for i in range(min(SEGMENTS_PER_STROKE, segments - stroke_start)):
+            x = min(max(x + rng.uniform(-20, 20), 0), 1000)
+            y = min(max(y + rng.uniform(-20, 20), 0), 1000)
+            if i % 2:
+                d.append(f"L{x:.2f} {y:.2f}")
+            else:
+                d.append(f"C{x - 5:.2f} {y + 5:.2f} {x + 5:.2f} {y - 5:.2f} {x:.2f} {y:.2f}")
+        parts.append(f'<path d="{" ".join(d)}" fill="none" stroke="black"/>')
+    with open(path, "w") as f:
+        f.write('<svg xmlns="http://www.w3.org/2000/svg" width="1000" height="1000" viewBox="0 0 1000 1000">\n')
+        f.write("\n".join(parts))
+        f.write("\n</svg>\n")
+
+
+def benchmark_point_stages(svg, label, repeats):
+    """
+    Times every stage of svg_to_simplified_points_list on its own (the
+    single-process path), each on the output of the stage before it.
+    """
+    results = {}
+    results[f"stage:svg2paths2[{label}]"], (paths, _, _) = time_call(lambda: svg2paths2(svg), repeats)
+    results[f"stage:split_svg_paths[{label}]"], split_paths = time_call(lambda: split_svg_paths(paths), repeats)
+    results[f"stage:sampling[{label}]"], raw_strokes = time_call(
+        lambda: [_sample_raw_points_for_path(path, SAMPLES_PER_SEGMENT) for path in split_paths], repeats)
+    results[f"stage:rdp[{label}]"], strokes = time_call(
+        lambda: [simplify_polyline_rdp(stroke, RDP_TOLERANCE) for stroke in raw_strokes], repeats)
+    simplified_points = [point for stroke in strokes for point in stroke + [(None, None)]]
+    results[f"stage:normalize_and_scale_points[{label}]"], scaled_points = time_call(
+        lambda: normalize_and_scale_points(simplified_points, L1 * 0.9, L2 * 0.9, MARGIN, "_AI" in label), repeats)
+    results[f"stage:add_pen_down_none_tuples[{label}]"], _ = time_call(
+        lambda: add_pen_down_none_tuples(list(scaled_points)), repeats)  # it inserts in place
+    return results
+
+
+def benchmark_svg(svg_path, repeats, out_dir):
+    """
+    Times generate_robot_command_from_svg end to end (outputs go to out_dir)
+    and then each of its stages on its own: the metrics, the point pipeline
+    (whole and per stage), densify, IK and both file writes. All with the
+    untuned default settings, so retuning compile_settings.json does not
+    move the numbers.
+    """
+    # Absolute paths pass straight through the svg_files lookup in svg_to_xy
+    svg = str(svg_path)
+    label = Path(svg_path).name
+    results = {}
+
+    results[f"full_pipeline[{label}]"], _ = time_call(
+        lambda: generate_robot_command_from_svg(svg, L1, L2, samples_per_segment=SAMPLES_PER_SEGMENT,
+                                                rdp_tolerance=RDP_TOLERANCE, profile=False,
+                                                xy_dir=out_dir, command_dir=out_dir),
+        repeats)
+
+    results[f"calculate_standardized_metrics[{label}]"], _ = time_call(
+        lambda: calculate_standardized_metrics(svg), repeats)
+    results[f"svg_to_simplified_points_list[{label}]"], points = time_call(
+        lambda: svg_to_simplified_points_list(svg, SAMPLES_PER_SEGMENT, L1, L2, MARGIN, RDP_TOLERANCE), repeats)
+    results.update(benchmark_point_stages(svg, label, repeats))
+    results[f"densify[{label}]"], (points, _) = time_call(
+        lambda: densify_for_joint_interpolation(points, L1, L2), repeats)
+    results[f"write_xy_file[{label}]"], _ = time_call(
+        lambda: write_lines_atomic(Path(out_dir) / f"output_{label}.txt", points), repeats)
+    results[f"generate_commands[{label}]"], command_list = time_call(
+        lambda: generate_commands(points, L1, L2), repeats)
+    results[f"write_command_file[{label}]"], _ = time_call(
+        lambda: generate_commands_file(command_list, label, out_dir=out_dir), repeats)
+
+    print(f"  {label}: {len(points)} points, {len(command_list)} commands, "
+          f"pipeline {results[f'full_pipeline[{label}]']:.3f} s")
+    return results
+
+
+def label_of(name):
+    # "full_pipeline[bottle_and_glass.svg]" -> "bottle_and_glass.svg"
+    return name[name.index("[") + 1:-1] if name.endswith("]") else name
+
+
+def run_benchmarks(sizes=SYNTHETIC_SIZES, repeats=REPEATS, labels=None):
+    """
+    Runs every benchmark, or only those whose label_of is in labels.
+    """
+    results = {}
+
+    def wanted(label):
+        return labels is None or label in labels
+
+    # Pipeline outputs go to a scratch directory, never over the real xy/command files
+    with tempfile.TemporaryDirectory() as tmp:
+        print("--- SVG corpus ---")
+        for svg_dir in SVG_DIRS:
+            for svg_path in sorted(svg_dir.glob("*.svg")):
+                if wanted(svg_path.name):
+                    results.update(benchmark_svg(svg_path, repeats, tmp))
+
+        print("--- Synthetic SVGs ---")
+        for size in sizes:
+            svg_path = Path(tmp) / f"synthetic_{size}.svg"
+            if wanted(svg_path.name):
+                write_synthetic_svg(svg_path, size)
+                # Large files are too slow to repeat
+                results.update(benchmark_svg(svg_path, repeats if size <= 10_000 else 1, tmp))
+
+    if wanted("xy_file_storage"):
+        print("--- XY loading ---")
+        xy_files = sorted(p for p in XY_FILE_STORAGE_DIR.iterdir() if p.is_file())
+        results["xy_loading[xy_file_storage]"], _ = time_call(
+            lambda: [read_commands_file(p) for p in xy_files], repeats)
+        print(f"  {len(xy_files)} files: {results['xy_loading[xy_file_storage]']:.3f} s")
+
+    if wanted("analyze_creativity_data"):
+        print("--- Survey analysis ---")
+        try:
+            from survey_data_analysis import analyze_creativity_data
+            results["analyze_creativity_data"], _ = time_call(lambda: analyze_creativity_data(SURVEY_FILE), repeats)
+            print(f"  analyze_creativity_data: {results['analyze_creativity_data']:.3f} s")
+        except ImportError as e:
+            print(f"  skipped ({e})")
+
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=TOLERANCE):
+    """
+    Returns the list of (name, baseline, current) that regressed by more
+    than tolerance (and more than NOISE_FLOOR seconds).
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        if name not in baseline:
+            continue
+        limit = baseline[name] * (1 + tolerance)
+        if current > limit and current - baseline[name] > NOISE_FLOOR:
+            regressions.append((name, baseline[name], current))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SVG-to-command pipeline.")
+    parser.add_argument("--update-baseline", action="store_true", help="save results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SYNTHETIC_SIZES),
+                        help="segment counts of the synthetic SVGs")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeats)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "results": results}, f, indent=2, sort_keys=True)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+
+    if baseline.get("machine") != platform.platform():
+        print(f"⚠️  Baseline was recorded on {baseline.get('machine')}, timings may not be comparable.")
+    regressions = compare_to_baseline(results, baseline["results"], args.tolerance)
+    if regressions:
+        # A slow stretch of a shared machine can push a whole file over the limit; only count what is slow twice
+        suspects = {label_of(name) for name, _, _ in regressions}
+        print(f"Re-measuring {len(suspects)} benchmark group(s) that look slower than the baseline...")
+        again = run_benchmarks(args.sizes, args.repeats, labels=suspects)
+        results = {name: min(seconds, again.get(name, seconds)) for name, seconds in results.items()}
+        regressions = compare_to_baseline(results, baseline["results"], args.tolerance)
+    for name, before, after in regressions:
+        print(f"❌ {name}: {before:.4f} s -> {after:.4f} s (+{(after / before - 1) * 100:.0f}%)")
+    if regressions:
+        return 1
+    print(f"✅ No benchmark regressed by more than {args.tolerance * 100:.0f}%.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
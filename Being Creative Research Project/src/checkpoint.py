@@ -0,0 +1,114 @@
+import json
+import os
+from pathlib import Path
+from command_generator import HOME_ANGLES, file_sha256, parse_command_line
+from serial_streamer import ECHO_PREFIX
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+CHECKPOINT_DIR = BASE_DIR / "data" / "checkpoints"
+
+
+def checkpoint_path_for(command_file, checkpoint_dir=CHECKPOINT_DIR):
+    return Path(checkpoint_dir) / f"{Path(command_file).name}.json"
+
+
+def load_checkpoint(command_file, checkpoint_dir=CHECKPOINT_DIR):
+    """
+    Returns the saved checkpoint for command_file, or None if there is none
+    or the file changed since it was written (hash mismatch).
+    """
+    path = checkpoint_path_for(command_file, checkpoint_dir)
+    try:
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if checkpoint.get("file_hash") != file_sha256(command_file):
+        print(f"❌ Error: {Path(command_file).name} changed since the checkpoint was saved, cannot resume.")
+        return None
+    return checkpoint
+
+
+def build_resume_commands(command_lines, checkpoint):
+    """
+    Returns (prefix, remaining): the commands that re-home the arm, restore
+    the pen state and travel pen-up to the last confirmed position, and the
+    commands still left to draw.
+    """
+    prefix = ["PEN UP", f"({HOME_ANGLES[0]}, {HOME_ANGLES[1]})"]
+    if checkpoint["position"] is not None:
+        prefix.append(f"({checkpoint['position'][0]}, {checkpoint['position'][1]})")
+    if checkpoint["pen_down"]:
+        prefix.append("PEN DOWN")
+    return prefix, command_lines[checkpoint["completed"]:]
+
+
+class StreamCheckpoint:
+    """
+    Follows the Arduino's "Processing command:" echoes and durably saves how
+    far the drawing got. A command only counts as completed once the next
+    one is echoed, so the command that was executing when the link dropped
+    is drawn again on resume.
+    """
+    def __init__(self, command_file, command_lines, start_index=0, skip_echoes=0, checkpoint_dir=CHECKPOINT_DIR):
+        self.command_file = Path(command_file)
+        self.command_lines = command_lines
+        self.path = checkpoint_path_for(command_file, checkpoint_dir)
+        self.file_hash = file_sha256(command_file)
+        self.start_index = start_index
+        self.skip_echoes = skip_echoes  # echoes of resume prefix commands
+        self.echoes = 0
+
+        # State replayed up to self.completed (the arm homes with the pen up)
+        self.completed = 0
+        self.pen_down = False
+        self.position = None
+        self._advance(start_index)
+
+    def _advance(self, completed):
+        for line in self.command_lines[self.completed:completed]:
+            command = parse_command_line(line)
+            if command == "PEN DOWN":
+                self.pen_down = True
+            elif command in ("PEN UP", "END"):
+                self.pen_down = False
+            elif isinstance(command, tuple) and command != (None, None):
+                self.position = command
+        self.completed = completed
+
+    def observe(self, response):
+        """
+        on_response callback for stream_commands/wait_for_finish.
+        """
+        if not response.startswith(ECHO_PREFIX):
+            return
+        self.echoes += 1
+        completed = self.start_index + max(0, self.echoes - self.skip_echoes - 1)
+        if completed > self.completed:
+            self._advance(min(completed, len(self.command_lines)))
+            self.save()
+
+    def save(self):
+        checkpoint = {
+            "command_file": self.command_file.name,
+            "file_hash": self.file_hash,
+            "completed": self.completed,
+            "total": len(self.command_lines),
+            "pen_down": self.pen_down,
+            "position": self.position,
+        }
+        # Write to a temp file and rename so a crash never leaves a half-written checkpoint
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def finish(self):
+        """
+        The drawing completed, so there is nothing to resume.
+        """
+        self.path.unlink(missing_ok=True)
@@ -1,15 +1,24 @@
+import hashlib
+import json
+import os
 from pathlib import Path
-from xy_to_angles_inverse_kinamatics import compute_joint_angles
+from xy_to_angles_inverse_kinamatics import compute_joint_angles, compute_joint_angle_path, HOME_ANGLES
 
 BASE_DIR = Path(__file__).parent.parent
+COMMAND_FILE_STORAGE_DIR = BASE_DIR / "data" / "command_file_storage"
+# Written by fidelity.tune_compile_settings
+COMPILE_SETTINGS_FILE = BASE_DIR / "data" / "compile_settings.json"
 
-def generate_commands(xypoints, l1, l2):
+def generate_commands(xypoints, l1, l2, minimize_travel=True):
     ''' Generate a list of commands from a list of (x, y) coordinates.
         Commands are tuples of (theta1, theta2) for the two joints, or strings "PEN UP", "PEN DOWN", "START", "END".
         l1 and l2 are the lengths of the two arm segments.
         xypoints is a list of (x, y) tuples, where (None, None) indicates pen up movement. in the form returned by svg_to_points_list
+        With minimize_travel, each point uses whichever elbow branch keeps total joint travel lowest (compute_joint_angle_path),
+        and points outside the 0..180 servo range are skipped; otherwise every point uses the single branch of compute_joint_angles.
     '''
     command_list = xypoints.copy()
+    path_angles = compute_joint_angle_path(xypoints, l1, l2) if minimize_travel else None
 
     is_down = True
     for i in range(len(xypoints)):
@@ -20,6 +29,10 @@ def generate_commands(xypoints, l1, l2):
             else:
                 command_list[i] = "PEN DOWN"
                 is_down = True
+        elif path_angles is not None:
+            command_list[i] = path_angles[i]
+            if path_angles[i] == (None, None):
+                print(f"Warning: point {xypoints[i]} is out of reach of the arm. skipped.")
         else:
             try:
               command_list[i] = compute_joint_angles(xypoints[i][0], xypoints[i][1], l1, l2)
@@ -33,10 +46,133 @@ def generate_commands(xypoints, l1, l2):
     command_list.append("END")
     return command_list
 
-def generate_commands_file(command_list, name):
+def write_lines_atomic(path, items):
+    ''' Write one item per line to path via a temp file and a rename, so readers never see a half-written file '''
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        for item in items:
+            f.write(f"{item}\n")
+    os.replace(tmp_path, path)
+
+def file_sha256(path):
+    ''' Hex SHA-256 of a file's contents, used to tell whether a source or command file changed '''
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_compile_settings(svg_filename=None):
+    ''' The tuned settings for one SVG (or all of them if no name is given); missing files or entries give an empty dict '''
+    try:
+        with open(COMPILE_SETTINGS_FILE, "r") as f:
+            settings = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        settings = {}
+    if svg_filename is None:
+        return settings
+    return settings.get(svg_filename, {})
+
+def generate_commands_file(command_list, name, out_dir=COMMAND_FILE_STORAGE_DIR):
     ''' Generate a command file from a list of commands given in the format returned by generate_commands '''
-    name = f"commands_{name}.txt"
-    with open(BASE_DIR / "data" / "command_file_storage" / name, "w") as f:
-        for command in command_list:
-            f.write(f"{command}\n")
+    write_lines_atomic(Path(out_dir) / f"commands_{name}.txt", command_list)
+
+
+PEN_COMMANDS = ("PEN UP", "PEN DOWN", "START", "END")
+
+def parse_command_line(line):
+    ''' Parse one line of a command or xy file.
+        Returns the command string for "PEN UP", "PEN DOWN", "START", "END", a (float, float) tuple for a move,
+        (None, None) for a skipped point, or None for blank/unparseable lines.
+    '''
+    line = line.strip()
+    if not line:
+        return None
+    if line in PEN_COMMANDS:
+        return line
+    if line.startswith("(") and line.endswith(")"):
+        parts = line[1:-1].split(",")
+        if len(parts) == 2:
+            a, b = parts[0].strip(), parts[1].strip()
+            if a == "None" or b == "None":
+                return (None, None)
+            try:
+                return (float(a), float(b))
+            except ValueError:
+                return None
+    return None
+
+def read_commands_file(path):
+    ''' Read a command file (or xy file) back into the list format returned by generate_commands '''
+    commands = []
+    with open(path, "r") as f:
+        for line in f:
+            command = parse_command_line(line)
+            if command is not None:
+                commands.append(command)
+    return commands
 
+# --- FIRMWARE TIMING MODEL ---
+# These should match the delays in main.cpp
+MOVE_STEP_MS = 8        # delay(8) per interpolation step in move_to
+MOVE_MIN_STEPS = 10     # minimum number of steps per move
+MOVE_SETTLE_MS = 1000   # pause after every move
+PEN_MS = 2200           # servo move + settle delay in pen_up/pen_down
+
+def estimate_draw_time(command_list):
+    ''' Estimate how long the robot takes to execute a command list, in seconds.
+        Mirrors move_to/pen_up/pen_down in main.cpp: a move takes one 8 ms step per degree of the largest joint delta.
+    '''
+    total_ms = 0
+    shoulder, elbow = HOME_ANGLES
+    for command in command_list:
+        if command in ("PEN UP", "PEN DOWN", "END"):
+            total_ms += PEN_MS
+        elif isinstance(command, tuple) and command != (None, None):
+            steps = int(max(abs(command[0] - shoulder), abs(command[1] - elbow)))
+            total_ms += max(steps, MOVE_MIN_STEPS) * MOVE_STEP_MS + MOVE_SETTLE_MS
+            shoulder, elbow = command
+    return total_ms / 1000.0
+
+# --- COMPACT WIRE PROTOCOL ---
+# Optional short encoding negotiated with the firmware at startup (see main.cpp).
+# Opcodes: "U" pen up, "D" pen down, "S" start, "E" end,
+#          "A<s>,<e>" absolute angles, "M<ds>,<de>" angle deltas,
+# with angles quantized to 1 / COMPACT_ANGLE_SCALE degrees.
+COMPACT_ANGLE_SCALE = 10  # must match COMPACT_ANGLE_SCALE in main.cpp
+COMPACT_HELLO = "PROTO C"
+COMPACT_ACK = "PROTO C OK"
+COMPACT_OPCODES = {"PEN UP": "U", "PEN DOWN": "D", "START": "S", "END": "E"}
+
+def encode_compact_commands(command_list):
+    ''' Encode a command list (as returned by generate_commands or read_commands_file) into compact protocol lines.
+        Moves are delta-encoded against the previous quantized position so rounding never accumulates.
+        (None, None) entries are dropped, like main() does for text command files. Any other string is sent as-is.
+    '''
+    encoded = []
+    position = None
+    for command in command_list:
+        if command in COMPACT_OPCODES:
+            encoded.append(COMPACT_OPCODES[command])
+        elif isinstance(command, tuple) and command != (None, None):
+            target = (round(command[0] * COMPACT_ANGLE_SCALE), round(command[1] * COMPACT_ANGLE_SCALE))
+            if position is None:
+                encoded.append(f"A{target[0]},{target[1]}")
+            else:
+                encoded.append(f"M{target[0] - position[0]},{target[1] - position[1]}")
+            position = target
+        elif isinstance(command, str):
+            encoded.append(command)  # Unknown commands pass through so the firmware reports them
+    return encoded
+
+def decode_compact_commands(encoded):
+    ''' Inverse of encode_compact_commands, mirroring the decoder in main.cpp. Useful for checking an encoding. '''
+    opcodes = {v: k for k, v in COMPACT_OPCODES.items()}
+    command_list = []
+    position = (0, 0)
+    for line in encoded:
+        if line in opcodes:
+            command_list.append(opcodes[line])
+            continue
+        s, e = (int(v) for v in line[1:].split(","))
+        position = (s, e) if line[0] == "A" else (position[0] + s, position[1] + e)
+        command_list.append((position[0] / COMPACT_ANGLE_SCALE, position[1] / COMPACT_ANGLE_SCALE))
+    return command_list
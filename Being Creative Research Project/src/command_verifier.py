@@ -0,0 +1,152 @@
+import numpy as np
+from pathlib import Path
+from command_generator import read_commands_file
+from xy_to_angles_inverse_kinamatics import forward_kinematics
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+XY_FILE_STORAGE_DIR = BASE_DIR / "data" / "xy_file_storage"
+XY_FILE_DIR = BASE_DIR / "data" / "xy_files"
+COMMAND_FILE_STORAGE_DIR = BASE_DIR / "data" / "command_file_storage"
+
+# Max allowed distance (same units as the xy files) between the source point
+# and the pen position rebuilt from the command angles
+VERIFY_TOLERANCE = 0.01
+
+
+def find_source_xy_file(command_file_path):
+    """
+    Finds the xy file a command file was generated from.
+    commands_<name>.txt comes from output_<name>.txt in xy_file_storage
+    (generate_robot_command_from_svg) or <name> in xy_files
+    (generate_robot_command_from_xy).
+    """
+    name = Path(command_file_path).name
+    if not (name.startswith("commands_") and name.endswith(".txt")):
+        return None
+    name = name[len("commands_"):-len(".txt")]
+
+    candidates = [
+        XY_FILE_STORAGE_DIR / f"output_{name}.txt",
+        XY_FILE_DIR / name,
+        XY_FILE_STORAGE_DIR / name,
+    ]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _strip_framing(command_list):
+    """
+    Undoes the framing added by generate_commands ("START" at 0, "PEN DOWN"
+    at 2, "PEN UP" and "END" at the end) so commands line up 1:1 with the
+    source xy points. Returns None if the framing is missing.
+    """
+    if len(command_list) < 4:
+        return None
+    if command_list[0] != "START" or command_list[2] != "PEN DOWN" or command_list[-2:] != ["PEN UP", "END"]:
+        return None
+    return [command_list[1]] + command_list[3:-2]
+
+
+def verify_commands(command_list, xy_points, l1, l2, tolerance=VERIFY_TOLERANCE):
+    """
+    Checks that a command list reproduces its source xy points.
+
+    Rebuilds every pen position with vectorized forward kinematics (including
+    the elbow - 90 servo offset) and compares it with the source point.
+
+    Returns:
+        dict: max/RMS deviation, indices of unreachable points (IK returned
+        (None, None)), indices of pen-state mismatches and an overall "ok".
+    """
+    report = {
+        "moves": 0,
+        "max_deviation": 0.0,
+        "rms_deviation": 0.0,
+        "unreachable": [],
+        "pen_mismatches": [],
+        "length_mismatch": False,
+        "framing_ok": True,
+        "ok": False,
+    }
+
+    body = _strip_framing(command_list)
+    if body is None:
+        report["framing_ok"] = False
+        return report
+    if len(body) != len(xy_points):
+        report["length_mismatch"] = True
+
+    move_idx = []
+    is_down = True  # generate_commands starts toggling from pen down
+    for i, (command, point) in enumerate(zip(body, xy_points)):
+        if point == (None, None):
+            expected = "PEN UP" if is_down else "PEN DOWN"
+            is_down = not is_down
+            if command != expected:
+                report["pen_mismatches"].append(i)
+        elif command == (None, None):
+            report["unreachable"].append(i)
+        elif isinstance(command, tuple):
+            move_idx.append(i)
+        else:
+            report["pen_mismatches"].append(i)
+
+    if move_idx:
+        angles = np.array([body[i] for i in move_idx], dtype=float)
+        targets = np.array([xy_points[i] for i in move_idx], dtype=float)
+        xs, ys = forward_kinematics(angles[:, 0], angles[:, 1], l1, l2)
+        deviations = np.hypot(xs - targets[:, 0], ys - targets[:, 1])
+        report["moves"] = len(move_idx)
+        report["max_deviation"] = float(deviations.max())
+        report["rms_deviation"] = float(np.sqrt(np.mean(deviations ** 2)))
+
+    report["ok"] = (
+        not report["length_mismatch"]
+        and not report["unreachable"]
+        and not report["pen_mismatches"]
+        and report["max_deviation"] <= tolerance
+    )
+    return report
+
+
+def verify_command_file(command_file_path, l1, l2, tolerance=VERIFY_TOLERANCE, xy_file_path=None):
+    """
+    Verifies one command file against its source xy file.
+    Returns the report from verify_commands with the file names added,
+    or None if no source xy file could be found.
+    """
+    command_file_path = Path(command_file_path)
+    if xy_file_path is None:
+        xy_file_path = find_source_xy_file(command_file_path)
+    if xy_file_path is None:
+        print(f"Error: No source xy file found for {command_file_path.name}")
+        return None
+
+    command_list = read_commands_file(command_file_path)
+    xy_points = [p for p in read_commands_file(xy_file_path) if isinstance(p, tuple)]
+
+    report = verify_commands(command_list, xy_points, l1, l2, tolerance)
+    report["command_file"] = command_file_path.name
+    report["xy_file"] = Path(xy_file_path).name
+    return report
+
+
+def verify_command_directory(command_dir=COMMAND_FILE_STORAGE_DIR, l1=13, l2=12.5, tolerance=VERIFY_TOLERANCE):
+    """
+    Verifies every command file in command_dir and prints a one-line summary
+    per file. Returns the list of reports.
+    """
+    reports = []
+    for command_file_path in sorted(Path(command_dir).glob("commands_*")):
+        report = verify_command_file(command_file_path, l1, l2, tolerance)
+        if report is None:
+            continue
+        status = "OK  " if report["ok"] else "FAIL"
+        print(f"{status} {report['command_file']}: max {report['max_deviation']:.2e}, "
+              f"rms {report['rms_deviation']:.2e}, unreachable {len(report['unreachable'])}, "
+              f"pen mismatches {len(report['pen_mismatches'])}")
+        reports.append(report)
+    return reports
@@ -0,0 +1,216 @@
+import numpy as np
+import json
+import itertools
+import contextlib
+import io
+import matplotlib.image as mpimg
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from svg_to_xy import svg_to_simplified_points_list, xy_points_to_strokes
+from command_generator import generate_commands, estimate_draw_time, load_compile_settings, COMPILE_SETTINGS_FILE
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+SVG_FILES_DIR = BASE_DIR / "data" / "svg_files"
+PNG_FILE_DIR = BASE_DIR / "data" / "png_file_storage"
+
+RASTER_SIZE = 256            # pixels along the longest side of the comparison raster
+DILATION_RADIUS = 3          # pixels of slack when comparing lines (absorbs pen width)
+INK_THRESHOLD = 0.25         # a reference pixel is ink if it is this much darker than white
+REFERENCE_BORDER = 0.04      # fraction of the reference image edge to ignore (export artifacts)
+FIDELITY_THRESHOLD = 0.6     # minimum IoU a tuned setting has to reach
+
+# Parameter grid searched by tune_compile_settings
+RDP_TOLERANCES = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0)
+SAMPLES_PER_SEGMENT_OPTIONS = (2, 5, 10, 20)
+
+
+# --- RASTERIZATION ---
+
+def _fit_to_canvas(rows, cols, size):
+    """
+    Uniformly scales pixel coordinates so their bounding box fits a
+    size x size canvas anchored at the top-left corner.
+    """
+    rows = rows - rows.min()
+    cols = cols - cols.min()
+    extent = max(rows.max(), cols.max())
+    scale = (size - 1) / extent if extent > 0 else 1.0
+    return np.rint(rows * scale).astype(int), np.rint(cols * scale).astype(int)
+
+
+def _dilate(mask, radius):
+    """
+    Square binary dilation using shifted ORs (separable, pure NumPy).
+    """
+    out = mask.copy()
+    for shift in range(1, radius + 1):
+        out[shift:, :] |= mask[:-shift, :]
+        out[:-shift, :] |= mask[shift:, :]
+    grown_rows = out.copy()
+    for shift in range(1, radius + 1):
+        out[:, shift:] |= grown_rows[:, :-shift]
+        out[:, :-shift] |= grown_rows[:, shift:]
+    return out
+
+
+def rasterize_strokes(strokes, size=RASTER_SIZE):
+    """
+    Rasterizes strokes ((N, 2) arrays, Y up) into a boolean size x size mask.
+    Every segment is sampled at least once per pixel of its length.
+    """
+    mask = np.zeros((size, size), dtype=bool)
+    strokes = [s for s in strokes if len(s) > 0]
+    if not strokes:
+        return mask
+
+    points = np.concatenate(strokes)
+    min_xy = points.min(axis=0)
+    extent = (points.max(axis=0) - min_xy).max()
+    scale = (size - 1) / extent if extent > 0 else 1.0
+    max_y = points[:, 1].max()
+
+    starts = np.concatenate([s[:-1] if len(s) > 1 else s for s in strokes])
+    ends = np.concatenate([s[1:] if len(s) > 1 else s for s in strokes])
+
+    # Number of samples per segment, then one flat array of interpolation parameters
+    seg_px = np.hypot(*((ends - starts) * scale).T)
+    counts = np.ceil(seg_px).astype(int) + 1
+    seg_idx = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = (offsets / np.maximum(counts - 1, 1)[seg_idx])[:, None]
+    samples = starts[seg_idx] + (ends[seg_idx] - starts[seg_idx]) * t
+
+    cols = np.rint((samples[:, 0] - min_xy[0]) * scale).astype(int)
+    rows = np.rint((max_y - samples[:, 1]) * scale).astype(int)
+    mask[np.clip(rows, 0, size - 1), np.clip(cols, 0, size - 1)] = True
+    return mask
+
+
+def load_reference_mask(png_path, size=RASTER_SIZE):
+    """
+    Loads a reference PNG as an ink mask cropped to the drawing and fitted to
+    the same canvas as rasterize_strokes.
+    """
+    image = mpimg.imread(png_path)
+    if image.ndim == 3:
+        rgb = image[..., :3]
+        if image.shape[2] == 4:
+            # Transparent pixels count as paper
+            rgb = rgb * image[..., 3:4] + (1.0 - image[..., 3:4])
+        darkness = 1.0 - rgb.min(axis=2)
+    else:
+        darkness = 1.0 - image
+    if darkness.max() > 1.0:
+        darkness = darkness / 255.0
+
+    ink = darkness > INK_THRESHOLD
+    border_r = int(ink.shape[0] * REFERENCE_BORDER)
+    border_c = int(ink.shape[1] * REFERENCE_BORDER)
+    # A 0 border would turn ink[-0:] into the whole image
+    if border_r:
+        ink[:border_r, :] = False
+        ink[-border_r:, :] = False
+    if border_c:
+        ink[:, :border_c] = False
+        ink[:, -border_c:] = False
+
+    mask = np.zeros((size, size), dtype=bool)
+    rows, cols = np.nonzero(ink)
+    if len(rows) == 0:
+        return mask
+    rows, cols = _fit_to_canvas(rows.astype(float), cols.astype(float), size)
+    mask[rows, cols] = True
+    return mask
+
+
+def fidelity_score(strokes, reference_mask, radius=DILATION_RADIUS):
+    """
+    IoU between the rasterized strokes and a reference mask, after dilating
+    both by radius pixels so line width and sub-pixel offsets don't count.
+    """
+    drawn = _dilate(rasterize_strokes(strokes, reference_mask.shape[0]), radius)
+    reference = _dilate(reference_mask, radius)
+    union = np.count_nonzero(drawn | reference)
+    if union == 0:
+        return 0.0
+    return np.count_nonzero(drawn & reference) / union
+
+
+# --- PARAMETER SWEEP ---
+
+def reference_png_for(svg_filename):
+    return PNG_FILE_DIR / f"{Path(svg_filename).stem}.png"
+
+
+def evaluate_settings(svg_filename, samples_per_segment, rdp_tolerance, l1, l2):
+    """
+    Compiles one SVG with the given settings and scores it against its
+    reference PNG. Returns a dict with the settings, score, command count and
+    estimated draw time in seconds.
+    """
+    # The sweep already runs one setting per process, so no nested stroke pool
+    points = svg_to_simplified_points_list(svg_filename, samples_per_segment=samples_per_segment,
+                                           arm_L1=l1, arm_L2=l2, margin=2, rdp_tolerance=rdp_tolerance, workers=1)
+    reference = load_reference_mask(reference_png_for(svg_filename))
+    command_list = generate_commands(points, l1, l2)
+    return {
+        "samples_per_segment": samples_per_segment,
+        "rdp_tolerance": rdp_tolerance,
+        "score": float(fidelity_score(xy_points_to_strokes(points), reference)),
+        "commands": len(command_list),
+        "draw_time": estimate_draw_time(command_list),
+    }
+
+
+def _evaluate_settings_quietly(args):
+    # generate_commands prints IK warnings; keep sweep output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return args[0], evaluate_settings(*args)
+
+
+def choose_settings(results, threshold=FIDELITY_THRESHOLD, objective="commands"):
+    """
+    Picks the cheapest result (fewest "commands" or lowest "draw_time") that
+    still reaches the threshold, or the best scoring one if none do.
+    """
+    passing = [r for r in results if r["score"] >= threshold]
+    if not passing:
+        best = max(results, key=lambda r: r["score"])
+        return dict(best, meets_threshold=False)
+    best = min(passing, key=lambda r: (r[objective], -r["score"]))
+    return dict(best, meets_threshold=True)
+
+
+def tune_compile_settings(svg_filenames=None, l1=13, l2=12.5, threshold=FIDELITY_THRESHOLD,
+                          objective="commands", workers=None, save=True):
+    """
+    Sweeps RDP_TOLERANCES x SAMPLES_PER_SEGMENT_OPTIONS for every SVG that has
+    a reference PNG, in parallel, and stores the chosen settings per file in
+    /data/compile_settings.json for generate_robot_command_from_svg.
+    """
+    if svg_filenames is None:
+        svg_filenames = sorted(p.name for p in SVG_FILES_DIR.glob("*.svg"))
+    svg_filenames = [name for name in svg_filenames if reference_png_for(name).exists()]
+
+    jobs = [(name, samples, tolerance, l1, l2) for name, samples, tolerance
+            in itertools.product(svg_filenames, SAMPLES_PER_SEGMENT_OPTIONS, RDP_TOLERANCES)]
+    results = {name: [] for name in svg_filenames}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, result in pool.map(_evaluate_settings_quietly, jobs, chunksize=4):
+            results[name].append(result)
+
+    chosen = {}
+    for name in svg_filenames:
+        chosen[name] = choose_settings(results[name], threshold, objective)
+        c = chosen[name]
+        flag = "" if c["meets_threshold"] else "  (below threshold)"
+        print(f"{name}: samples_per_segment={c['samples_per_segment']}, rdp_tolerance={c['rdp_tolerance']}, "
+              f"IoU {c['score']:.2f}, {c['commands']} commands, ~{c['draw_time'] / 60:.1f} min{flag}")
+
+    if save:
+        settings = load_compile_settings()
+        settings.update(chosen)
+        with open(COMPILE_SETTINGS_FILE, "w") as f:
+            json.dump(settings, f, indent=2, sort_keys=True)
+    return chosen
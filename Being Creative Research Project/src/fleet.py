@@ -0,0 +1,196 @@
+import json
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+import serial
+from command_generator import HOME_ANGLES
+from serial_streamer import (load_command_lines, wait_for_first_request, negotiate_protocol,
+                             encode_for_protocol, stream_job)
+from plot_server import JOB_DIR, DONE_DIR, STATUS_PORT, POLL_INTERVAL, JobQueue, start_status_server
+
+
+class FleetStatus:
+    """
+    Thread-safe progress of every robot in the fleet plus fleet-wide
+    throughput, served as JSON by the status endpoint.
+    """
+    def __init__(self, ports):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.pending = 0  # jobs queued or being drawn
+        self.queue = []
+        self.robots = {
+            port: {
+                "state": "connecting",
+                "protocol": None,
+                "current_job": None,
+                "sent": 0,
+                "total": 0,
+                "jobs_completed": 0,
+                "commands_sent": 0,
+                "busy_seconds": 0.0,
+                "error": None,
+            }
+            for port in ports
+        }
+
+    def update_robot(self, port, **changes):
+        with self._lock:
+            self.robots[port].update(changes)
+
+    def add_to_robot(self, port, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.robots[port][key] += value
+
+    def add_pending(self, count):
+        with self._lock:
+            self.pending += count
+
+    def set_queue(self, names):
+        with self._lock:
+            self.queue = list(names)
+
+    def all_robots_down(self):
+        with self._lock:
+            return all(r["state"] == "error" for r in self.robots.values())
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            commands = sum(r["commands_sent"] for r in self.robots.values())
+            return json.loads(json.dumps({
+                "elapsed_seconds": elapsed,
+                "pending_jobs": self.pending,
+                "queue": self.queue,
+                "jobs_completed": sum(r["jobs_completed"] for r in self.robots.values()),
+                "commands_sent": commands,
+                "commands_per_second": commands / elapsed if elapsed > 0 else 0.0,
+                "robots": self.robots,
+            }))
+
+
+def _robot_worker(port, baudrate, protocol, jobs, done_dir, status):
+    """
+    One I/O thread per robot: takes the next job whenever its robot is idle,
+    so a slow robot never holds up the others. Any error takes the robot out
+    of the fleet; a job it had not finished drawing goes back on the queue
+    for another robot.
+    """
+    home_command = f"({HOME_ANGLES[0]}, {HOME_ANGLES[1]})"
+    job = None
+    drawn = False
+    try:
+        with serial.Serial(port, baudrate, timeout=1) as ser:
+            wait_for_first_request(ser)
+            robot_protocol = negotiate_protocol(ser, protocol)
+            status.update_robot(port, state="idle", protocol=robot_protocol)
+
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+
+                commands = load_command_lines(job)
+                if not commands:
+                    print(f"❌ [{port}] {job.name} is empty or contains no valid commands, skipping.")
+                    shutil.move(job, done_dir / job.name)
+                    status.add_pending(-1)
+                    job = None
+                    continue
+
+                drawn = False
+                commands = encode_for_protocol(commands + [home_command], robot_protocol)
+                status.update_robot(port, state="drawing", current_job=job.name, sent=0, total=len(commands))
+                start = time.time()
+
+                def on_sent(i, n, port=port):
+                    status.update_robot(port, sent=i)
+                    status.add_to_robot(port, commands_sent=1)
+
+                if not stream_job(ser, commands, on_sent=on_sent):
+                    # drawn is still False, so the handler below hands the job to another robot
+                    raise TimeoutError(f"{job.name} was not confirmed finished")
+                drawn = True
+
+                shutil.move(job, done_dir / job.name)
+                status.add_to_robot(port, jobs_completed=1, busy_seconds=time.time() - start)
+                status.update_robot(port, state="idle", current_job=None)
+                status.add_pending(-1)
+                print(f"✅ [{port}] Finished job {job.name}")
+                job = None
+
+    except Exception as e:
+        # Any failure (serial link, garbled response, file move) takes this robot out of the fleet
+        kind = "SERIAL ERROR" if isinstance(e, serial.SerialException) else f"ERROR ({type(e).__name__})"
+        print(f"\n❌ [{port}] {kind}: {e}")
+        status.update_robot(port, state="error", current_job=None, error=f"{type(e).__name__}: {e}")
+        if job is not None:
+            if drawn:
+                # Already on paper, only the move to done_dir failed: do not draw it twice
+                print(f"❌ [{port}] {job.name} was drawn but could not be moved to {done_dir}")
+                status.add_pending(-1)
+            else:
+                jobs.put(job)  # Let another robot draw it
+
+
+def run_fleet(serial_ports, baudrate, job_dir=JOB_DIR, done_dir=DONE_DIR, protocol="auto",
+              status_port=STATUS_PORT, poll_interval=POLL_INTERVAL, stop_when_empty=False):
+    """
+    Drives several identical robots at once. Command files dropped into
+    job_dir go into one shared FIFO queue and each robot takes the next job
+    as soon as it is idle. Finished files are moved to done_dir. Runs until
+    Ctrl-C (or until all jobs are done if stop_when_empty is set) and
+    returns the final fleet status.
+    """
+    job_dir = Path(job_dir)
+    done_dir = Path(done_dir)
+    done_dir.mkdir(parents=True, exist_ok=True)
+
+    status = FleetStatus(serial_ports)
+    httpd = start_status_server(status, port=status_port) if status_port else None
+    jobs = queue.Queue()
+
+    workers = [
+        threading.Thread(target=_robot_worker, args=(port, baudrate, protocol, jobs, done_dir, status), daemon=True)
+        for port in serial_ports
+    ]
+    for worker in workers:
+        worker.start()
+
+    job_queue = JobQueue(job_dir)
+    seen = set()
+    try:
+        while True:
+            listed = job_queue.scan()
+            for job in listed:
+                if job.name not in seen:
+                    seen.add(job.name)
+                    status.add_pending(1)
+                    jobs.put(job)
+            # Forget files that were moved to done_dir so the same name can be queued again
+            seen &= {job.name for job in listed}
+            status.set_queue(job.name for job in listed)
+
+            if status.all_robots_down():
+                print("❌ All robots are disconnected, stopping the fleet.")
+                break
+            if stop_when_empty and status.pending == 0:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\n🛑 Fleet stopped by user.")
+    finally:
+        for _ in workers:
+            jobs.put(None)
+        for worker in workers:
+            worker.join(timeout=5)
+        if httpd is not None:
+            httpd.shutdown()
+
+    snapshot = status.snapshot()
+    print(f"📊 Fleet: {snapshot['jobs_completed']} jobs, {snapshot['commands_sent']} commands in "
+          f"{snapshot['elapsed_seconds']:.1f} s ({snapshot['commands_per_second']:.2f} commands/s)")
+    return snapshot
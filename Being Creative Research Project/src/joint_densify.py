@@ -0,0 +1,204 @@
+import math
+import numpy as np
+from xy_to_angles_inverse_kinamatics import (compute_joint_angle_candidates, compute_joint_angle_path,
+                                             forward_kinematics)
+
+# --- CONFIGURATION ---
+# main.cpp writes the elbow in whole degrees (elbow_servo.write(round(...))),
+# the shoulder in microseconds, so the elbow sets the pen's resolution
+ELBOW_SERVO_STEP = 1.0
+DEVIATION_SAMPLES = 33   # points checked along every joint-space move
+BISECT_STEPS = 20        # precision of each inserted point (1 / 2**20 of the segment)
+MAX_UNIFORM_SPLITS = 64  # give up looking for a uniform split factor beyond this
+
+
+def servo_step_tolerance(l2):
+    """
+    Default for the max distance (xy units) the pen may stray from a
+    straight segment while move_to in main.cpp interpolates linearly between
+    two joint poses: half an elbow step at the pen (about 0.11 for
+    l2 = 12.5). Rounding to whole degrees already moves the pen that far, so
+    a tighter tolerance only adds points the servo cannot draw.
+    """
+    return l2 * math.radians(ELBOW_SERVO_STEP) / 2
+
+
+# --- MEASURING ---
+
+def joint_path_deviation(start_angles, end_angles, start_points, end_points, l1, l2):
+    """
+    For every move, how far the pen strays from the straight segment
+    start_points -> end_points when the joints go linearly from start_angles
+    to end_angles (what move_to does). All arguments are (moves, 2) arrays.
+    Returns a (moves,) array of maximum deviations.
+    """
+    t = np.linspace(0.0, 1.0, DEVIATION_SAMPLES)[None, :, None]
+    angles = start_angles[:, None, :] + t * (end_angles - start_angles)[:, None, :]
+    xs, ys = forward_kinematics(angles[..., 0], angles[..., 1], l1, l2)
+    pen = np.stack([xs, ys], axis=-1)
+
+    # Distance from every pen sample to the closest point of its segment
+    direction = (end_points - start_points)[:, None, :]
+    length_sq = np.sum(direction ** 2, axis=-1)
+    offset = pen - start_points[:, None, :]
+    u = np.divide(np.sum(offset * direction, axis=-1), length_sq,
+                  out=np.zeros(length_sq.shape[:1] + (DEVIATION_SAMPLES,)), where=length_sq > 0)
+    closest = start_points[:, None, :] + np.clip(u, 0.0, 1.0)[..., None] * direction
+    return np.max(np.hypot(*(pen - closest).transpose(2, 0, 1)), axis=1)
+
+
+def _drawn_moves(xypoints, angles):
+    """
+    Index pairs (previous, current) of every pen-down move between two
+    reachable points, with the pen convention of generate_commands: the first
+    point is a travel move, then every (None, None) toggles the pen.
+    """
+    moves = []
+    previous = None
+    is_down = False
+    for i, (point, pose) in enumerate(zip(xypoints, angles)):
+        if point == (None, None):
+            is_down = not is_down
+            continue
+        if pose == (None, None):
+            continue
+        if previous is not None and is_down:
+            moves.append((previous, i))
+        elif previous is None:
+            is_down = True  # "PEN DOWN" comes right after the first point
+        previous = i
+    return moves
+
+
+def measure_joint_path_deviation(xypoints, l1, l2, angles=None):
+    """
+    Deviation of every pen-down move of an xy point list, with the joint
+    poses generate_commands would choose (or the given angles).
+    """
+    if angles is None:
+        angles = compute_joint_angle_path(xypoints, l1, l2)
+    moves = _drawn_moves(xypoints, angles)
+    if not moves:
+        return np.zeros(0)
+    prev, cur = np.array(moves).T
+    points = np.array([p if p != (None, None) else (np.nan, np.nan) for p in xypoints], dtype=float)
+    poses = np.array([a if a != (None, None) else (np.nan, np.nan) for a in angles], dtype=float)
+    return joint_path_deviation(poses[prev], poses[cur], points[prev], points[cur], l1, l2)
+
+
+# --- SPLITTING ---
+
+def _pose_near(point, guide, l1, l2):
+    # The IK solution for point closest to guide in joint space, so the
+    # inserted pose stays on the branch (and shoulder wrap) of the move
+    candidates = compute_joint_angle_candidates(point[0], point[1], l1, l2)
+    if not candidates:
+        return None
+    return np.array(min(candidates, key=lambda c: max(abs(c[0] - guide[0]), abs(c[1] - guide[1]))))
+
+
+def _deviation(a0, a1, p0, p1, l1, l2):
+    return joint_path_deviation(a0[None], a1[None], p0[None], p1[None], l1, l2)[0]
+
+
+def split_move(p0, p1, a0, a1, l1, l2, tolerance=None):
+    """
+    The fewest points to insert on the segment p0 -> p1 so that every
+    joint-space sub-move stays within tolerance of the line. Greedy: each
+    inserted point is pushed as far along the segment as the tolerance
+    allows (found by bisection), which is optimal because any piece of a
+    short-enough piece is short enough too.
+    Returns a list of ((x, y), (shoulder, elbow)).
+    """
+    if tolerance is None:
+        tolerance = servo_step_tolerance(l2)
+    p0, p1, a0, a1 = (np.asarray(v, dtype=float) for v in (p0, p1, a0, a1))
+    inserted = []
+    s, a_s = 0.0, a0
+    while _deviation(a_s, a1, p0 + s * (p1 - p0), p1, l1, l2) > tolerance:
+        start = p0 + s * (p1 - p0)
+        lo, hi, best = s, 1.0, None
+        for _ in range(BISECT_STEPS):
+            mid = (lo + hi) / 2
+            point = p0 + mid * (p1 - p0)
+            pose = _pose_near(point, a0 + mid * (a1 - a0), l1, l2)
+            if pose is not None and _deviation(a_s, pose, start, point, l1, l2) <= tolerance:
+                lo, best = mid, (point, pose)
+            else:
+                hi = mid
+        if best is None:
+            # Line leaves the reachable area, or the tolerance is below bisection precision
+            break
+        inserted.append(((float(best[0][0]), float(best[0][1])), (float(best[1][0]), float(best[1][1]))))
+        s, a_s = lo, best[1]
+    return inserted
+
+
+def _uniform_splits_needed(p0, p1, a0, a1, l1, l2, tolerance):
+    # Smallest k such that cutting the move into k equal pieces meets the tolerance (None if there is none)
+    for k in range(2, MAX_UNIFORM_SPLITS + 1):
+        u = np.linspace(0.0, 1.0, k + 1)
+        points = p0 + u[:, None] * (p1 - p0)
+        poses = [a0] + [_pose_near(p, a0 + t * (a1 - a0), l1, l2) for p, t in zip(points[1:-1], u[1:-1])] + [a1]
+        if any(pose is None for pose in poses):
+            return None
+        poses = np.array(poses)
+        if np.all(joint_path_deviation(poses[:-1], poses[1:], points[:-1], points[1:], l1, l2) <= tolerance):
+            return k
+    return None
+
+
+def densify_for_joint_interpolation(xypoints, l1, l2, tolerance=None):
+    """
+    Post-RDP stage: inserts points into pen-down moves whose joint-space
+    interpolation would bow away from the straight line by more than
+    tolerance, using as few points as possible. Pen markers and order are
+    kept. Also works out how many points uniform oversampling (every move
+    cut into the same number of pieces) would need for the same tolerance;
+    uniform_splits / uniform_points_added are None if no uniform split
+    works for some move (uniform_failed_moves counts those). tolerance
+    defaults to servo_step_tolerance(l2).
+
+    Returns:
+        tuple: (new xy point list, report dict)
+    """
+    if tolerance is None:
+        tolerance = servo_step_tolerance(l2)
+    angles = compute_joint_angle_path(xypoints, l1, l2)
+    moves = _drawn_moves(xypoints, angles)
+    deviations = measure_joint_path_deviation(xypoints, l1, l2, angles)
+    over = [move for move, deviation in zip(moves, deviations) if deviation > tolerance]
+
+    insertions = {}
+    uniform_splits = 1
+    not_uniformly_splittable = 0
+    for prev, cur in over:
+        args = (xypoints[prev], xypoints[cur], angles[prev], angles[cur], l1, l2, tolerance)
+        insertions[cur] = [point for point, _ in split_move(*args)]
+        k = _uniform_splits_needed(*(np.asarray(a, dtype=float) for a in args[:4]), l1, l2, tolerance)
+        if k is None:
+            # e.g. a line grazing a joint limit, where evenly spaced points are out of reach
+            not_uniformly_splittable += 1
+        else:
+            uniform_splits = max(uniform_splits, k)
+
+    densified = []
+    for i, point in enumerate(xypoints):
+        densified.extend(insertions.get(i, ()))
+        densified.append(point)
+
+    after = measure_joint_path_deviation(densified, l1, l2)
+    uniform_achievable = not_uniformly_splittable == 0
+    report = {
+        "tolerance": tolerance,
+        "moves": len(moves),
+        "moves_over_tolerance": len(over),
+        "max_deviation_before": float(deviations.max()) if len(deviations) else 0.0,
+        "max_deviation_after": float(after.max()) if len(after) else 0.0,
+        "points_added": len(densified) - len(xypoints),
+        # What raising the sampling everywhere would cost: every move cut into uniform_splits pieces
+        "uniform_splits": uniform_splits if uniform_achievable else None,
+        "uniform_points_added": (uniform_splits - 1) * len(moves) if uniform_achievable else None,
+        "uniform_failed_moves": not_uniformly_splittable,
+    }
+    return densified, report
@@ -51,6 +51,13 @@ bool active = false; // Flag to show if arm is busy moving
 char lineBuf[128];
 size_t lineIdx = 0;
 
+// Compact protocol (negotiated by the host with "PROTO C")
+// Angles arrive as integers in 1/COMPACT_ANGLE_SCALE degrees.
+#define COMPACT_ANGLE_SCALE 10
+bool compact_mode = false;
+long compact_shoulder = 0; // Last decoded position, in 1/COMPACT_ANGLE_SCALE degrees
+long compact_elbow = 0;
+
 // Request throttling
 unsigned long lastRequestMillis = 0;
 const unsigned long REQUEST_INTERVAL_MS = 300; // ms between "REQUEST" signals
@@ -220,6 +227,46 @@ void move_to(float shoulder_destination, float elbow_destination) {
   lcd.print("Move Done       ");
 }
 
+// ----- Compact Protocol -----
+// Decodes one compact command: "U", "D", "S", "E", "A<s>,<e>" (absolute) or "M<ds>,<de>" (delta).
+// Returns false if the command is not valid compact syntax.
+bool process_compact_command(const String &cmd) {
+  char op = cmd.charAt(0);
+
+  if (cmd.length() == 1) {
+    if (op == 'U') { pen_up(); return true; }
+    if (op == 'D') { pen_down(); return true; }
+    if (op == 'E') { pen_up(); return true; } // Lift pen at the end of the file
+    if (op == 'S') {
+      lcd.setCursor(0, 0);
+      lcd.print("File Started    ");
+      return true;
+    }
+    return false;
+  }
+
+  if (op != 'A' && op != 'M') return false;
+
+  // Integer parsing only, no String searches or toFloat()
+  const char *p = cmd.c_str() + 1;
+  char *end;
+  long s = strtol(p, &end, 10);
+  if (end == p || *end != ',') return false;
+  p = end + 1;
+  long e = strtol(p, &end, 10);
+  if (end == p || *end != '\0') return false;
+
+  if (op == 'A') {
+    compact_shoulder = s;
+    compact_elbow = e;
+  } else {
+    compact_shoulder += s;
+    compact_elbow += e;
+  }
+  move_to(compact_shoulder / (float)COMPACT_ANGLE_SCALE, compact_elbow / (float)COMPACT_ANGLE_SCALE);
+  return true;
+}
+
 // ----- Setup -----
 void setup() {
   // Attach all servos to their respective pins
@@ -278,7 +325,15 @@ void loop() {
     }
 
     // --- Command Parser ---
-    if (cmd == "PEN UP") {
+    if (cmd == "PROTO C") {
+      // Host asks to switch to the compact protocol
+      compact_mode = true;
+      Serial.println("PROTO C OK");
+    }
+    else if (compact_mode && process_compact_command(cmd)) {
+      // Handled by the compact decoder
+    }
+    else if (cmd == "PEN UP") {
       pen_up();
     }
     else if (cmd == "PEN DOWN") {
@@ -1,136 +1,173 @@
-from svg_to_xy import *
-from xy_to_angles_inverse_kinamatics import *
-from command_generator import *
-from xydrawing_tester import *
 from pathlib import Path
-import serial
-import time
+import argparse
+import os
 import shutil
 
+# NOTE: Everything else is imported inside the functions that need it, so
+# e.g. streaming a finished command file never loads numpy, matplotlib,
+# svgpathtools or rdp.
+
 
 # --- Configuration ---
 BASE_DIR = Path(__file__).parent.parent
 # Make sure this path points correctly to your commands.txt file
 COMMAND_FILE_DIR = BASE_DIR / "data" / "command_files" 
-SERIAL_PORT = 'COM3'  # <-- CHANGE THIS to your Arduino's serial port
-BAUDRATE = 9600
-
-# --- Constants ---
-# These should match the constants in your Arduino sketch
-ARDUINO_BUFFER_SIZE = 10
-ARDUINO_LOW_THRESHOLD = 3
-# Calculate batch size to send to avoid overflowing the Arduino buffer
-COMMAND_BATCH_SIZE = ARDUINO_BUFFER_SIZE - ARDUINO_LOW_THRESHOLD
+SVG_FILES_DIR = BASE_DIR / "data" / "svg_files"
+SERIAL_PORT = os.environ.get("ROBOT_SERIAL_PORT", 'COM3')  # <-- CHANGE THIS to your Arduino's serial port
+BAUDRATE = int(os.environ.get("ROBOT_BAUDRATE", 9600))
+# Arm segment lengths (the sampling defaults live in svg_to_xy / compile_settings.json)
+ARM_L1 = 13
+ARM_L2 = 12.5
+# samples_per_segment the compile/watch commands use for SVGs that were never tuned
+CLI_SAMPLES_PER_SEGMENT = 5
 
-
-def main():
+def main(protocol="auto", resume=False, port=None, baudrate=None):
     """
     Connects to the Arduino and sends commands in batches upon request.
+    protocol is "auto" (compact if the firmware supports it), "compact" or "text".
+    Progress is checkpointed as the Arduino confirms commands; resume=True
+    continues an interrupted drawing from the last confirmed command.
+    port and baudrate default to SERIAL_PORT and BAUDRATE.
     """
+    import serial
+    from serial_streamer import (load_command_lines, wait_for_first_request, negotiate_protocol,
+                                 encode_for_protocol, stream_job, ProtocolError)
+    from checkpoint import StreamCheckpoint, load_checkpoint, build_resume_commands
+
+    port = port or SERIAL_PORT
+    baudrate = baudrate or BAUDRATE
     COMMAND_FILE = next(COMMAND_FILE_DIR.glob('*'))
     if not COMMAND_FILE.exists():
         print(f"❌ Error: Command file not found at {COMMAND_FILE}")
         return
 
-    # Read all commands from the file, filtering out empty lines
-    with open(COMMAND_FILE, 'r') as f:
-        # Also filter out any lines with '(None, None)'
-        commands = [
-            line.strip() for line in f 
-            if line.strip() and '(None, None)' not in line
-        ]
+    # Read all commands from the file, filtering out empty lines and '(None, None)'
+    commands = load_command_lines(COMMAND_FILE)
 
     if not commands:
         print("❌ Error: Command file is empty or contains no valid commands.")
         return
 
+    prefix = []
+    start_index = 0
+    if resume:
+        checkpoint = load_checkpoint(COMMAND_FILE)
+        if checkpoint is None:
+            print(f"❌ Error: No usable checkpoint for {COMMAND_FILE.name}.")
+            return
+        prefix, remaining = build_resume_commands(commands, checkpoint)
+        start_index = checkpoint["completed"]
+        print(f"↩️  Resuming {COMMAND_FILE.name} at command {start_index + 1}/{len(commands)}.")
+    else:
+        remaining = commands
+    tracker = StreamCheckpoint(COMMAND_FILE, commands, start_index=start_index, skip_echoes=len(prefix))
+
     print("Attempting to connect to Arduino...")
     try:
-        with serial.Serial(SERIAL_PORT, BAUDRATE, timeout=1) as ser:
-            print(f"✅ Connected to {SERIAL_PORT} at {BAUDRATE} baud.")
-            print("Waiting for Arduino to initialize...")
-            time.sleep(2)  # Wait for Arduino to reset
-
-            # --- Synchronization: Wait for the first REQUEST ---
-            print("Waiting for the first 'REQUEST' from Arduino to start...")
-            initial_request_received = False
-            while not initial_request_received:
-                if ser.in_waiting > 0:
-                    response = ser.readline().decode().strip()
-                    if response:
-                        print(f"Arduino: {response}")
-                    if "REQUEST" in response:
-                        initial_request_received = True
-                        print("🚀 Arduino is ready! Starting command stream.")
-            
+        with serial.Serial(port, baudrate, timeout=1) as ser:
+            print(f"✅ Connected to {port} at {baudrate} baud.")
+            wait_for_first_request(ser)
+
+            protocol = negotiate_protocol(ser, protocol)
+            to_send = encode_for_protocol(prefix + remaining, protocol)
+
             # --- Main Sending Loop ---
-            command_index = 0
-            while command_index < len(commands):
-                if ser.in_waiting > 0:
-                    response = ser.readline().decode().strip()
-                    if response:
-                        print(f"Arduino: {response}")
-
-                    # If Arduino requests more, send the next batch
-                    if "REQUEST" in response:
-                        print(f"--> Received REQUEST. Sending batch of up to {COMMAND_BATCH_SIZE} commands.")
-                        
-                        for _ in range(COMMAND_BATCH_SIZE):
-                            if command_index < len(commands):
-                                cmd = commands[command_index]
-                                ser.write((cmd + '\n').encode())
-                                print(f"    Sent [{command_index + 1}/{len(commands)}]: {cmd}")
-                                command_index += 1
-                                time.sleep(0.5) # Small delay between sends
-                            else:
-                                break # No more commands left
-            
-            print("\n🎉 All commands sent. Waiting for Arduino to finish...")
-            
-            # --- FIX: Wait for the buffer to empty ---
-            # Keep the serial port open and listen for the final
-            # "REQUEST" signals, which indicate the buffer is empty.
-            final_request_count = 0
-            while final_request_count < 2: # Wait for 2 more requests
-                if ser.in_waiting > 0:
-                    response = ser.readline().decode().strip()
-                    if response:
-                        print(f"Arduino (finishing): {response}")
-                        if "REQUEST" in response:
-                            final_request_count += 1
-                else:
-                    # If no response, assume Arduino is done
-                    time.sleep(0.5)
-                    if not ser.in_waiting > 0:
-                         break # Break if no activity
-
-            print("✅ Robot should be finished. Closing port.")
+            # Returns once the echo after the last command shows it was drawn (which also completes the checkpoint)
+            if stream_job(ser, to_send, on_response=tracker.observe):
+                tracker.finish()
+                print("✅ Robot finished the drawing. Closing port.")
+            else:
+                print(f"Progress saved at command {tracker.completed}/{len(commands)}. Run main(resume=True) to continue.")
 
 
     except serial.SerialException as e:
         print(f"\n❌ SERIAL ERROR: {e}")
         print("Please check the following:")
         print(f"  1. Is the Arduino plugged in?")
-        print(f"  2. Is '{SERIAL_PORT}' the correct port? Check the Arduino IDE.")
+        print(f"  2. Is '{port}' the correct port? Check the Arduino IDE.")
         print(f"  3. Is another program (like the Arduino Serial Monitor) using the port?")
+        print(f"Progress saved at command {tracker.completed}/{len(commands)}. Run main(resume=True) to continue.")
+    except ProtocolError as e:
+        print(f"\n❌ PROTOCOL ERROR: {e}")
+        print("Check the port and baud rate, flash the current main.cpp or stream with protocol=\"auto\" / \"text\".")
     except KeyboardInterrupt:
         print("\n🛑 Program stopped by user.")
+        print(f"Progress saved at command {tracker.completed}/{len(commands)}. Run main(resume=True) to continue.")
+
+def serve(protocol="auto", port=None, baudrate=None):
+    # Long-running version of main(): draws every file dropped into /data/command_files/ over one connection
+    from plot_server import run_plot_server
+    return run_plot_server(port or SERIAL_PORT, baudrate or BAUDRATE, job_dir=COMMAND_FILE_DIR, protocol=protocol)
+
+def fleet(ports, protocol="auto", baudrate=None, simulate=0):
+    # Drives several robots at once from the shared /data/command_files/ queue.
+    # simulate=N adds N pty-backed simulated robots (POSIX only) for trying it without hardware.
+    from fleet import run_fleet
+
+    robots = []
+    if simulate:
+        from simulated_robot import SimulatedRobot
+        robots = [SimulatedRobot().start() for _ in range(simulate)]
+    try:
+        return run_fleet(list(ports) + [r.port for r in robots], baudrate or BAUDRATE,
+                         job_dir=COMMAND_FILE_DIR, protocol=protocol, stop_when_empty=bool(simulate))
+    finally:
+        for robot in robots:
+            robot.stop()
 
 '''take an svg file at /data/svg_files/svg_filename and generate a command file at /data/command_files/commands.txt'''
-def generate_robot_command_from_svg(svg_filename, l1, l2, samples_per_segment=20):
-    print(calculate_standardized_metrics(svg_filename))
-    points = svg_to_simplified_points_list(svg_filename, samples_per_segment=samples_per_segment, arm_L1=l1, arm_L2=l2, margin=2)
-    print(f"Generated {len(points)} points from SVG '{svg_filename}'.")
-    name = f"output_{svg_filename}.txt"
-    with open(BASE_DIR / "data" / "xy_file_storage" / name, 'w') as f:
-        for point in points:
-            f.write(f"{point}\n")
+def generate_robot_command_from_svg(svg_filename, l1, l2, samples_per_segment=None, rdp_tolerance=None, profile=None, line_tolerance=None,
+                                    xy_dir=None, command_dir=None, default_samples_per_segment=None):
+    from svg_to_xy import svg_to_simplified_points_list, RDP_TOLERANCE, SAMPLES_PER_SEGMENT
+    from command_generator import (generate_commands, generate_commands_file, write_lines_atomic, load_compile_settings,
+                                   COMMAND_FILE_STORAGE_DIR)
+    from profiler import make_profiler
+    from joint_densify import densify_for_joint_interpolation, servo_step_tolerance
+
+    # svg_filename may also be a full path (e.g. from benchmark.py); outputs are named after the file only
+    base_name = Path(svg_filename).name
+    with make_profiler(profile, name=base_name) as profiler:
+        # Settings not passed in come from tune_compile_settings, then the global defaults
+        tuned = load_compile_settings(svg_filename)
+        if samples_per_segment is None:
+            samples_per_segment = tuned.get("samples_per_segment", default_samples_per_segment or SAMPLES_PER_SEGMENT)
+        if rdp_tolerance is None:
+            rdp_tolerance = tuned.get("rdp_tolerance", RDP_TOLERANCE)
+        # The standardized metrics come out of the same pass over the strokes
+        points, metrics = svg_to_simplified_points_list(svg_filename, samples_per_segment=samples_per_segment, arm_L1=l1, arm_L2=l2, margin=2,
+                                                        rdp_tolerance=rdp_tolerance, profiler=profiler, with_metrics=True)
+        print(metrics)
+        print(f"Generated {len(points)} points from SVG '{svg_filename}'.")
+        if line_tolerance is None:
+            line_tolerance = servo_step_tolerance(l2)
+        if line_tolerance:
+            with profiler.stage("densify", points_in=len(points)) as stage:
+                points, report = densify_for_joint_interpolation(points, l1, l2, tolerance=line_tolerance)
+                stage.points_out = len(points)
+            if report["uniform_points_added"] is None:
+                uniform = f"uniform oversampling cannot reach it on {report['uniform_failed_moves']} lines"
+            else:
+                uniform = f"uniform oversampling would add {report['uniform_points_added']}"
+            print(f"Added {report['points_added']} points to keep lines within {line_tolerance:.3g} ({uniform}).")
+        name = f"output_{base_name}.txt"
+        with profiler.stage("write_xy_file", points_in=len(points)):
+            write_lines_atomic(Path(xy_dir or BASE_DIR / "data" / "xy_file_storage") / name, points)
     
     
-    command_list = generate_commands(points, l1, l2)
-    generate_commands_file(command_list, svg_filename)
+        with profiler.stage("ik", points_in=len(points)) as stage:
+            command_list = generate_commands(points, l1, l2)
+            stage.points_out = len(command_list)
+        with profiler.stage("write_command_file", points_in=len(command_list)):
+            generate_commands_file(command_list, base_name, out_dir=command_dir or COMMAND_FILE_STORAGE_DIR)
+
+        if profiler.enabled:
+            profiler.print_summary()
+            summary_path, trace_path = profiler.save()
+            print(f"Profile written to {summary_path} and {trace_path}")
 
 def generate_robot_command_from_xy(xy_filename, l1, l2):
+    from command_generator import generate_commands, generate_commands_file
+
     xy_file_path = BASE_DIR / "data" / "xy_files" / xy_filename
     points = []
     with open(xy_file_path, 'r') as f:
@@ -145,47 +182,247 @@ def generate_robot_command_from_xy(xy_filename, l1, l2):
     command_list = generate_commands(points, l1, l2)
     generate_commands_file(command_list, xy_filename)
 
-def move_file_into_cmd_files(src_path):
+def move_file_into_cmd_files(src_path, l1=13, l2=12.5, verify=True):
+    # Pre-flight gate: only files that reproduce their source drawing go to the robot
+    from command_verifier import verify_command_file
+
+    if verify:
+        report = verify_command_file(src_path, l1, l2)
+        if report is None or not report["ok"]:
+            print(f"❌ Error: {src_path.name} failed verification, not moving it. Report: {report}")
+            return False
     shutil.move(src_path, BASE_DIR / "data" / "command_files" / src_path.name)
+    return True
+
+def watch_svg_files(l1=13, l2=12.5, samples_per_segment=None, rdp_tolerance=None, once=False, line_tolerance=None,
+                    default_samples_per_segment=None):
+    # Incremental version of the compile loop: only new or changed SVGs are recompiled
+    from svg_watcher import watch_svg_directory
+    return watch_svg_directory(l1, l2, samples_per_segment, rdp_tolerance, once=once, line_tolerance=line_tolerance,
+                               default_samples_per_segment=default_samples_per_segment)
 
 def visualize_xy_file():
+    from xydrawing_tester import read_points_file, plot_xy_points, XY_FILE_DIR
+
     # 2. Read the points from the file
     points = read_points_file()
     # 3. Plot the data
     plot_xy_points(points, title=f"Visualization of XY Points from {next(XY_FILE_DIR.glob('*')).name}")
 
+def preview_all_files(src_dir=BASE_DIR / "data" / "xy_file_storage", fmt="png", l1=13, l2=12.5):
+    # Headless, parallel previews of every file in src_dir into /data/preview_storage/
+    from xydrawing_tester import render_preview_directory
+    return render_preview_directory(src_dir, fmt=fmt, l1=l1, l2=l2)
+
 
 '''USER FUNCTIONS TO CALL
     visualize_xy_file()
     - reads the first xy file in /data/xy_files/ and visualizes it
 
-    move_file_into_cmd_files(src_path)
+    preview_all_files(src_dir, fmt="png", l1, l2)
+    - renders a preview image of every file in src_dir (xy_file_storage or command_file_storage) without opening a window
+    - command files are turned back into XY using forward kinematics with arm lengths l1 and l2
+    - writes <filename>.<fmt> (png or svg) into /data/preview_storage/
+
+    move_file_into_cmd_files(src_path, l1, l2, verify=True)
     - moves a file at src_path into the /data/command_files/ directory
+    - first checks the file against its source xy file with forward kinematics and refuses to move it if the check fails
+    - pass verify=False to move a hand-edited file anyway
+
+    command_verifier.verify_command_directory(command_dir, l1, l2)
+    - checks every command file in command_dir (default /data/command_file_storage/) against its source xy file
+    - prints max/RMS deviation, unreachable points and pen-state mismatches for each file
     
     generate_robot_command_from_xy(xy_filename, l1, l2)
     - expects an xy file in /data/xy_files/xy_filename
     - l1 and l2 are the lengths of the two arm segments
     - generates a command file at /data/command_file_storage/commands_xy_filename.txt
     
-    generate_robot_command_from_svg(svg_filename, l1, l2)
+    generate_robot_command_from_svg(svg_filename, l1, l2, samples_per_segment=None, rdp_tolerance=None, line_tolerance=None, xy_dir=None, command_dir=None, default_samples_per_segment=None)
     - expects an svg file in /data/svg_files/svg_filename
     - l1 and l2 are the lengths of the two arm segments
+    - settings left as None use the tuned values in /data/compile_settings.json, or default_samples_per_segment
+      (else svg_to_xy.SAMPLES_PER_SEGMENT, 20) / RDP_TOLERANCE if the file was never tuned
+    - profile=True (or the environment variable PIPELINE_PROFILE=1) times every stage and counts points in/out,
+      and writes /data/profiles/<svg_filename>.profile.json plus a Chrome trace <svg_filename>.trace.json
+      (profile="memory" / PIPELINE_PROFILE=memory also records peak memory, but tracemalloc slows the timings down)
     - generates a command file at /data/command_file_storage/commands_svg_filename.txt
+      (xy_dir / command_dir write the two files somewhere else; svg_filename may then be a full path)
     - might error if the svg has points out of reach of the arm
+    - large svgs are sampled and simplified on every CPU core at once (svg_to_xy.PARALLEL_MIN_POINTS)
+    - the Arduino moves both joints linearly, which bends long straight lines into arcs; points are added to the
+      lines that would bend by more than line_tolerance (default half a 1-degree elbow step at the pen,
+      joint_densify.servo_step_tolerance, 0 turns it off)
     
-    main()
+    watch_svg_files(l1, l2, samples_per_segment=None, rdp_tolerance=None, once=False, line_tolerance=None, default_samples_per_segment=None)
+    - watches /data/svg_files/ and recompiles only SVGs that were added or changed (content hash or compile settings)
+    - writes the xy and command files atomically, same names as generate_robot_command_from_svg
+    - deletes the outputs of SVGs removed from /data/svg_files/ (files it did not compile are left alone)
+    - remembers what it built in /data/compile_manifest.json, so restarting it does not recompile everything
+    - once=True does a single pass and returns
+
+    shape_similarity.export_similarity(svg_dir, out_dir)
+    - compares every <name>.svg with its <name>_AI.svg: symmetric Hausdorff, chamfer and discrete Frechet distance
+      of the drawings scaled into a unit square (0 = identical, roughly 1 = nothing in common)
+    - writes /data/similarity/pair_similarity.csv (one row per stimulus, to join with the survey ratings)
+      and similarity_matrix_<metric>.csv with every drawing compared against every other
+
+    fidelity.tune_compile_settings(svg_filenames=None, l1, l2, threshold=0.6, objective="commands")
+    - rasterizes every svg in /data/svg_files/ over a grid of rdp_tolerance / samples_per_segment values and scores it (IoU) against its reference png in /data/png_file_storage/
+    - keeps the cheapest settings ("commands" or "draw_time") that still reach the threshold
+    - saves them to /data/compile_settings.json for generate_robot_command_from_svg
+
+    main(protocol="auto", resume=False, port=None, baudrate=None)
     - connects to the Arduino and sends commands from the command file in /data/command_files/
+    - saves a checkpoint in /data/checkpoints/ every time the Arduino confirms a command
+    - resume=True re-homes, restores the pen state and continues an interrupted drawing from the last confirmed command
+    - protocol="auto" switches to the compact protocol (short opcodes, delta-encoded angles) if the firmware supports it, "text" forces the old format,
+      "compact" stops with an error if the firmware does not accept it
     - WILL DO THE FIRST FILE IT FINDS IN THAT DIRECTORY
     - must be connected to arduino with matching serial settings
     - sends commands in batches upon request from the Arduino
+
+    serve(protocol="auto", port=None, baudrate=None)
+    - keeps the serial connection open and treats /data/command_files/ as a job queue (oldest file first)
+    - draws jobs back to back, homing the arm between them, and moves finished files to /data/command_files_done/
+    - queue status as JSON at http://127.0.0.1:8765/status
+    - runs until stopped with Ctrl-C
+
+    fleet(ports, protocol="auto", baudrate=None, simulate=0)
+    - like serve() but drives one robot per serial port in ports at the same time, each from its own I/O thread
+    - every robot takes the next file from /data/command_files/ as soon as it is idle
+    - fleet progress and commands/second at http://127.0.0.1:8765/status
+    - simulate=N adds N simulated robots on pseudo-terminals and stops when the queue is empty
+
+COMMAND LINE
+    python main.py compile [svg_filename ...]   (all of /data/svg_files/ if none given)
+    python main.py compile-xy xy_filename
+    python main.py watch [--once]
+    python main.py stream [--resume] [--protocol auto|compact|text]
+    python main.py serve
+    python main.py fleet PORT [PORT ...] [--simulate N]
+    python main.py preview [xy|commands|directory] [--format png|svg]
+    python main.py metrics [svg_filename ...]
+    python main.py similarity
+    python main.py analyze-survey [csv_path]
+    - --port/--baudrate (or ROBOT_SERIAL_PORT/ROBOT_BAUDRATE) and --l1/--l2/--samples-per-segment/--line-tolerance override the configuration above
+    - compile and watch use the tuned samples_per_segment, else CLI_SAMPLES_PER_SEGMENT (5)
 '''
+
+# --- Command line ---
+
+def _cmd_compile(args):
+    names = args.svg_filenames or sorted(p.name for p in SVG_FILES_DIR.iterdir())
+    for name in names:
+        print(f"Using command file: {name}")
+        generate_robot_command_from_svg(name, l1=args.l1, l2=args.l2, samples_per_segment=args.samples_per_segment,
+                                        profile="memory" if args.profile_memory else args.profile,
+                                        line_tolerance=args.line_tolerance,
+                                        default_samples_per_segment=CLI_SAMPLES_PER_SEGMENT)
+
+def _cmd_watch(args):
+    watch_svg_files(l1=args.l1, l2=args.l2, samples_per_segment=args.samples_per_segment, once=args.once,
+                    line_tolerance=args.line_tolerance, default_samples_per_segment=CLI_SAMPLES_PER_SEGMENT)
+
+def _cmd_compile_xy(args):
+    generate_robot_command_from_xy(args.xy_filename, l1=args.l1, l2=args.l2)
+
+def _cmd_stream(args):
+    main(protocol=args.protocol, resume=args.resume, port=args.port, baudrate=args.baudrate)
+
+def _cmd_serve(args):
+    serve(protocol=args.protocol, port=args.port, baudrate=args.baudrate)
+
+def _cmd_fleet(args):
+    fleet(args.ports, protocol=args.protocol, baudrate=args.baudrate, simulate=args.simulate)
+
+def _cmd_preview(args):
+    sources = {
+        "xy": BASE_DIR / "data" / "xy_file_storage",
+        "commands": BASE_DIR / "data" / "command_file_storage",
+    }
+    preview_all_files(sources.get(args.source, Path(args.source)), fmt=args.format, l1=args.l1, l2=args.l2)
+
+def _cmd_metrics(args):
+    from svg_to_xy import calculate_standardized_metrics
+    names = args.svg_filenames or sorted(p.name for p in SVG_FILES_DIR.iterdir())
+    for name in names:
+        print(f"{name}: {calculate_standardized_metrics(name)}")
+
+def _cmd_similarity(args):
+    from shape_similarity import export_similarity
+    print(export_similarity().to_string(index=False))
+
+def _cmd_analyze_survey(args):
+    from survey_data_analysis import analyze_creativity_data
+    analyze_creativity_data(Path(args.csv_path))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Drawing robot tools: compile SVGs, preview and stream command files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    arm = argparse.ArgumentParser(add_help=False)
+    arm.add_argument("--l1", type=float, default=ARM_L1, help="length of the first arm segment")
+    arm.add_argument("--l2", type=float, default=ARM_L2, help="length of the second arm segment")
+
+    p = sub.add_parser("compile", parents=[arm], help="SVG -> xy file + command file")
+    p.add_argument("svg_filenames", nargs="*", help="files in /data/svg_files/ (default: all)")
+    p.add_argument("--samples-per-segment", type=int, default=None,
+                   help=f"default: tuned value from compile_settings.json, else {CLI_SAMPLES_PER_SEGMENT}")
+    p.add_argument("--profile", action="store_true", default=None, help="time every pipeline stage")
+    p.add_argument("--profile-memory", action="store_true",
+                   help="also record peak memory per stage (slows the pipeline down, timings not comparable)")
+    p.add_argument("--line-tolerance", type=float, default=None, help="max bend of straight lines (0 = off)")
+    p.set_defaults(func=_cmd_compile)
+
+    p = sub.add_parser("watch", parents=[arm], help="recompile SVGs in /data/svg_files/ as they change")
+    p.add_argument("--samples-per-segment", type=int, default=None,
+                   help=f"default: tuned value from compile_settings.json, else {CLI_SAMPLES_PER_SEGMENT}")
+    p.add_argument("--once", action="store_true", help="do one pass and exit")
+    p.add_argument("--line-tolerance", type=float, default=None, help="max bend of straight lines (0 = off)")
+    p.set_defaults(func=_cmd_watch)
+
+    p = sub.add_parser("compile-xy", parents=[arm], help="xy file -> command file")
+    p.add_argument("xy_filename", help="file in /data/xy_files/")
+    p.set_defaults(func=_cmd_compile_xy)
+
+    for name, func, help_text in (("stream", _cmd_stream, "draw the first file in /data/command_files/"),
+                                  ("serve", _cmd_serve, "draw every file dropped into /data/command_files/")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--port", default=SERIAL_PORT)
+        p.add_argument("--baudrate", type=int, default=BAUDRATE)
+        p.add_argument("--protocol", choices=("auto", "compact", "text"), default="auto")
+        if name == "stream":
+            p.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("fleet", help="draw /data/command_files/ on several robots at once")
+    p.add_argument("ports", nargs="*", help="one serial port per robot")
+    p.add_argument("--baudrate", type=int, default=BAUDRATE)
+    p.add_argument("--protocol", choices=("auto", "compact", "text"), default="auto")
+    p.add_argument("--simulate", type=int, default=0, help="add N simulated robots (POSIX only)")
+    p.set_defaults(func=_cmd_fleet)
+
+    p = sub.add_parser("preview", parents=[arm], help="render preview images without a window")
+    p.add_argument("source", nargs="?", default="xy", help="xy, commands or a directory")
+    p.add_argument("--format", choices=("png", "svg"), default="png")
+    p.set_defaults(func=_cmd_preview)
+
+    p = sub.add_parser("metrics", help="print standardized complexity metrics")
+    p.add_argument("svg_filenames", nargs="*", help="files in /data/svg_files/ (default: all)")
+    p.set_defaults(func=_cmd_metrics)
+
+    p = sub.add_parser("similarity", help="shape distances between human and AI drawings")
+    p.set_defaults(func=_cmd_similarity)
+
+    p = sub.add_parser("analyze-survey", help="print the statistical analysis of the survey")
+    p.add_argument("csv_path", nargs="?", default=str(BASE_DIR / "data" / "Creativity Project_November 12, 2025_13.09.csv"))
+    p.set_defaults(func=_cmd_analyze_survey)
+    return parser
+
 if __name__ == '__main__':
-      SVG_FILES_DIR = BASE_DIR / "data" / "svg_files"
-      for file in SVG_FILES_DIR.iterdir():
-         print(f"Using command file: {file.name}")
-         generate_robot_command_from_svg(file.name, l1=13, l2=12.5, samples_per_segment=5)
-    
-    # generate_robot_command_from_xy("2_dots_lmao.txt", l1=13, l2=12.5)
-    # move_file_into_cmd_files(BASE_DIR / "data" / "command_file_storage" / "2_dots_lmao.txt.txt")
-    #main()
-    # visualize_xy_file()
\ No newline at end of file
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.func is _cmd_fleet and not args.ports and not args.simulate:
+        parser.error("fleet needs at least one serial port or --simulate N")
+    args.func(args)
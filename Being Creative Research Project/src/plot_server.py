@@ -0,0 +1,190 @@
+import itertools
+import json
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import serial
+from command_generator import HOME_ANGLES
+from serial_streamer import (load_command_lines, wait_for_first_request, negotiate_protocol,
+                             encode_for_protocol, stream_job, ProtocolError)
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+JOB_DIR = BASE_DIR / "data" / "command_files"
+DONE_DIR = BASE_DIR / "data" / "command_files_done"
+STATUS_HOST = "127.0.0.1"
+STATUS_PORT = 8765
+POLL_INTERVAL = 1.0  # seconds between scans of an empty job queue
+
+
+class PlotServerStatus:
+    """
+    Thread-safe snapshot of what the plot server is doing, served as JSON.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {
+            "state": "starting",
+            "protocol": None,
+            "current_job": None,
+            "sent": 0,
+            "total": 0,
+            "queue": [],
+            "completed": [],
+            "failed": [],
+        }
+
+    def update(self, **changes):
+        with self._lock:
+            self._state.update(changes)
+
+    def append(self, key, value):
+        with self._lock:
+            self._state[key] = self._state[key] + [value]
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._state))
+
+
+def list_jobs(job_dir=JOB_DIR):
+    """
+    Returns the command files waiting in job_dir, sorted by modification
+    time, then name. shutil.move and cp -p keep a file's mtime, so this is
+    not the order jobs were queued in; JobQueue keeps that.
+    """
+    jobs = []
+    for p in Path(job_dir).iterdir():
+        if p.name.startswith("."):
+            continue
+        try:
+            if p.is_file():
+                jobs.append(((p.stat().st_mtime, p.name), p))
+        except FileNotFoundError:
+            continue  # moved to the done dir (e.g. by a fleet robot) while listing
+    return [p for _, p in sorted(jobs)]
+
+
+class JobQueue:
+    """
+    The command files waiting in job_dir in the order they arrived (FIFO).
+    Every file is numbered the first time a scan sees it; files found in the
+    same scan (e.g. the backlog at startup) go by list_jobs order.
+    """
+    def __init__(self, job_dir=JOB_DIR):
+        self.job_dir = Path(job_dir)
+        self._arrival = {}
+        self._counter = itertools.count()
+
+    def scan(self):
+        files = list_jobs(self.job_dir)
+        for p in files:
+            if p.name not in self._arrival:
+                self._arrival[p.name] = next(self._counter)
+        # Forget files that were moved to done_dir so the same name queues again at the back
+        names = {p.name for p in files}
+        self._arrival = {name: n for name, n in self._arrival.items() if name in names}
+        return sorted(files, key=lambda p: self._arrival[p.name])
+
+
+def start_status_server(status, host=STATUS_HOST, port=STATUS_PORT):
+    """
+    Serves status.snapshot() as JSON on http://host:port/status in a
+    background thread. Returns the HTTP server so it can be shut down.
+    """
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(status.snapshot(), indent=2).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for robot output
+
+    httpd = ThreadingHTTPServer((host, port), StatusHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"📡 Queue status at http://{host}:{port}/status")
+    return httpd
+
+
+def run_plot_server(serial_port, baudrate, job_dir=JOB_DIR, done_dir=DONE_DIR, protocol="auto",
+                    status_port=STATUS_PORT, poll_interval=POLL_INTERVAL, stop_when_empty=False):
+    """
+    Keeps one serial connection open and draws every command file dropped
+    into job_dir, in the order they arrive, homing the arm between jobs. A
+    job counts as finished (and its file is moved to done_dir) once the
+    home move at its end is done, not when its last command is sent. Runs until Ctrl-C (or until the queue is empty
+    if stop_when_empty is set).
+    """
+    job_dir = Path(job_dir)
+    done_dir = Path(done_dir)
+    done_dir.mkdir(parents=True, exist_ok=True)
+
+    status = PlotServerStatus()
+    httpd = start_status_server(status, port=status_port) if status_port else None
+
+    # Every job ends by parking the arm at home so the next one starts from a known pose
+    home_command = f"({HOME_ANGLES[0]}, {HOME_ANGLES[1]})"
+
+    try:
+        with serial.Serial(serial_port, baudrate, timeout=1) as ser:
+            print(f"✅ Connected to {serial_port} at {baudrate} baud.")
+            wait_for_first_request(ser)
+            protocol = negotiate_protocol(ser, protocol)
+            status.update(protocol=protocol, state="idle")
+            job_queue = JobQueue(job_dir)
+
+            while True:
+                jobs = job_queue.scan()
+                status.update(queue=[p.name for p in jobs])
+                if not jobs:
+                    if stop_when_empty:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                job = jobs[0]
+                commands = load_command_lines(job)
+                if not commands:
+                    print(f"❌ Error: {job.name} is empty or contains no valid commands, skipping.")
+                    status.append("failed", job.name)
+                    shutil.move(job, done_dir / job.name)
+                    continue
+
+                commands = encode_for_protocol(commands + [home_command], protocol)
+                status.update(state="drawing", current_job=job.name, sent=0, total=len(commands),
+                              queue=[p.name for p in jobs[1:]])
+                print(f"\n🖊️  Starting job {job.name} ({len(commands)} commands)")
+
+                if not stream_job(ser, commands, on_sent=lambda i, n: status.update(sent=i)):
+                    # The robot went quiet mid-job: keep the file queued so a restart draws it again
+                    print(f"❌ {job.name} was not confirmed finished, leaving it in {job_dir}. Stopping.")
+                    status.append("failed", job.name)
+                    status.update(state="error", current_job=None)
+                    break
+
+                shutil.move(job, done_dir / job.name)
+                status.append("completed", job.name)
+                status.update(state="idle", current_job=None)
+                print(f"✅ Finished job {job.name}")
+
+    except serial.SerialException as e:
+        print(f"\n❌ SERIAL ERROR: {e}")
+        status.update(state="error")
+    except ProtocolError as e:
+        print(f"\n❌ PROTOCOL ERROR: {e}")
+        status.update(state="error")
+    except KeyboardInterrupt:
+        print("\n🛑 Plot server stopped by user.")
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+    return status.snapshot()
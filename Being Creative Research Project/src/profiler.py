@@ -0,0 +1,201 @@
+import json
+import os
+import time
+import tracemalloc
+from pathlib import Path
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+PROFILE_DIR = BASE_DIR / "data" / "profiles"
+# Set PIPELINE_PROFILE=1 to time every stage without changing any code, or
+# PIPELINE_PROFILE=memory to also record peak memory. tracemalloc slows the
+# pure-Python stages (rdp, calculate_standardized_metrics) several times over,
+# so the timings of a memory run are not comparable with normal ones.
+PROFILE_ENV_VAR = "PIPELINE_PROFILE"
+MEMORY_PROFILE = "memory"
+
+
+class _Stage:
+    """
+    One timed run of a pipeline stage. Set points_out inside the with block.
+    """
+    def __init__(self, profiler, name, points_in):
+        self.profiler = profiler
+        self.name = name
+        self.points_in = points_in
+        self.points_out = None
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1] if self.profiler.track_memory else 0
+        self.profiler._record(self, self.start, end, peak)
+        return False
+
+
+class PipelineProfiler:
+    """
+    Records wall time and points in/out for every stage of the
+    SVG-to-command pipeline, plus peak traced memory if track_memory is set.
+    Results go out as a JSON summary or a Chrome trace (open in
+    chrome://tracing or https://ui.perfetto.dev). Use it as a context
+    manager so memory tracing is stopped even if a stage raises.
+    """
+    enabled = True
+
+    def __init__(self, name="pipeline", track_memory=False):
+        self.name = name
+        self.events = []
+        self.track_memory = track_memory
+        self._started_tracing = track_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self.origin = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        # Stops memory tracing if this profiler started it
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def stage(self, name, points_in=None):
+        return _Stage(self, name, points_in)
+
+    def _record(self, stage, start, end, peak):
+        self.events.append({
+            "stage": stage.name,
+            "start": start - self.origin,
+            "duration": end - start,
+            "points_in": stage.points_in,
+            "points_out": stage.points_out,
+            "peak_memory": peak,
+        })
+
+    def summary(self):
+        """
+        Per-stage totals, in the order stages first ran.
+        """
+        stages = {}
+        for event in self.events:
+            s = stages.setdefault(event["stage"], {
+                "calls": 0, "seconds": 0.0, "points_in": 0, "points_out": 0, "peak_memory": 0,
+            })
+            s["calls"] += 1
+            s["seconds"] += event["duration"]
+            s["points_in"] += event["points_in"] or 0
+            s["points_out"] += event["points_out"] or 0
+            s["peak_memory"] = max(s["peak_memory"], event["peak_memory"])
+        return {
+            "name": self.name,
+            "total_seconds": sum(s["seconds"] for s in stages.values()),
+            "peak_memory": max((s["peak_memory"] for s in stages.values()), default=0),
+            "stages": stages,
+        }
+
+    def chrome_trace(self):
+        return {"traceEvents": [
+            {
+                "name": event["stage"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["duration"] * 1e6,
+                "pid": 0,
+                "tid": 0,
+                "args": {k: event[k] for k in ("points_in", "points_out", "peak_memory")},
+            }
+            for event in self.events
+        ]}
+
+    def print_summary(self):
+        summary = self.summary()
+        memory = self.track_memory
+        print(f"--- Profile: {self.name} ({summary['total_seconds']:.3f} s"
+              + (f", peak {summary['peak_memory'] / 1e6:.1f} MB, timings slowed by tracemalloc" if memory else "")
+              + ") ---")
+        for name, s in summary["stages"].items():
+            print(f"  {name:<28} {s['seconds']:8.4f} s  x{s['calls']:<6} "
+                  f"points {s['points_in']} -> {s['points_out']}"
+                  + (f"  peak {s['peak_memory'] / 1e6:.1f} MB" if memory else ""))
+
+    def save(self, out_dir=PROFILE_DIR):
+        """
+        Writes <name>.profile.json and <name>.trace.json into out_dir and
+        stops memory tracing if this profiler started it.
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        summary_path = out_dir / f"{self.name}.profile.json"
+        trace_path = out_dir / f"{self.name}.trace.json"
+        with open(summary_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(trace_path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+        self.close()
+        return summary_path, trace_path
+
+
+class _NullStage:
+    points_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullProfiler:
+    """
+    Stand-in used when profiling is off. Every stage is the same shared
+    no-op context manager, so instrumented code costs almost nothing.
+    """
+    enabled = False
+    _stage = _NullStage()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def close(self):
+        pass
+
+    def stage(self, name, points_in=None):
+        return self._stage
+
+    def print_summary(self):
+        pass
+
+    def save(self, out_dir=PROFILE_DIR):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def make_profiler(profile=None, name="pipeline", track_memory=False):
+    """
+    Returns a time-only PipelineProfiler if profile is True, one that also
+    tracks memory if profile is "memory" (or track_memory is set), else
+    NULL_PROFILER. When profile is None the PIPELINE_PROFILE environment
+    variable decides the same way.
+    """
+    if profile is None:
+        setting = os.environ.get(PROFILE_ENV_VAR, "")
+        profile = setting if setting not in ("", "0") else False
+    if not profile:
+        return NULL_PROFILER
+    return PipelineProfiler(name, track_memory or profile == MEMORY_PROFILE)
@@ -0,0 +1,211 @@
+import time
+from command_generator import COMPACT_HELLO, COMPACT_ACK, encode_compact_commands, parse_command_line
+
+# --- Constants ---
+# These should match the constants in your Arduino sketch
+ARDUINO_BUFFER_SIZE = 10
+ARDUINO_LOW_THRESHOLD = 3
+# Calculate batch size to send to avoid overflowing the Arduino buffer
+COMMAND_BATCH_SIZE = ARDUINO_BUFFER_SIZE - ARDUINO_LOW_THRESHOLD
+# How long to wait for the Arduino to accept the compact protocol
+PROTOCOL_NEGOTIATION_TIMEOUT = 3.0
+# Wait after opening the port, the Arduino resets when the connection opens
+ARDUINO_RESET_DELAY = 2.0
+# Give up if no REQUEST arrives this long after the reset (wrong port or baud rate, firmware not flashed)
+FIRST_REQUEST_TIMEOUT = 15.0
+# Small delay between sends
+SEND_DELAY = 0.5
+# Sleep while the Arduino has nothing to say, so several streams can share the CPU
+IDLE_POLL_DELAY = 0.005
+# Printed by main.cpp when it pops a command; the next one is only popped once the move is over
+ECHO_PREFIX = "Processing command:"
+# Sent after a job: a no-op for the firmware (the pen is already up), echoed once the job's last move is done
+FINISH_MARKER = "END"
+# Give up waiting for echoes after this long without a line (a move sends REQUEST every 0.3 s while it runs)
+ECHO_IDLE_TIMEOUT = 10.0
+
+
+class ProtocolError(Exception):
+    """
+    The Arduino never sent its first REQUEST, or did not accept the
+    protocol that was asked for.
+    """
+
+
+def load_command_lines(command_file_path):
+    """
+    Reads all commands from a command file, filtering out empty lines and
+    any lines with '(None, None)'.
+    """
+    with open(command_file_path, 'r') as f:
+        return [
+            line.strip() for line in f
+            if line.strip() and '(None, None)' not in line
+        ]
+
+
+def wait_for_first_request(ser, timeout=None):
+    """
+    Waits for the Arduino to initialize and send its first REQUEST.
+    Raises ProtocolError if none arrives within timeout seconds (default
+    FIRST_REQUEST_TIMEOUT).
+    """
+    if timeout is None:
+        timeout = FIRST_REQUEST_TIMEOUT
+    print("Waiting for Arduino to initialize...")
+    time.sleep(ARDUINO_RESET_DELAY)  # Wait for Arduino to reset
+
+    # --- Synchronization: Wait for the first REQUEST ---
+    print("Waiting for the first 'REQUEST' from Arduino to start...")
+    deadline = time.time() + timeout
+    while True:
+        if time.time() > deadline:
+            raise ProtocolError(f"No REQUEST from the Arduino within {timeout:.0f} s")
+        if ser.in_waiting > 0:
+            response = ser.readline().decode().strip()
+            if response:
+                print(f"Arduino: {response}")
+            if "REQUEST" in response:
+                print("🚀 Arduino is ready! Starting command stream.")
+                return
+        else:
+            time.sleep(IDLE_POLL_DELAY)
+
+
+def negotiate_protocol(ser, protocol="auto"):
+    """
+    Asks the Arduino to switch to the compact protocol.
+    Returns "compact" if it acknowledged, otherwise "text" (older firmware
+    answers "Invalid format" and keeps using the text protocol). Only
+    protocol="auto" falls back: an explicit "compact" raises ProtocolError
+    if the firmware does not answer PROTO C OK.
+    """
+    if protocol not in ("auto", "compact", "text"):
+        raise ValueError(f"Unknown protocol {protocol!r}, expected 'auto', 'compact' or 'text'")
+    if protocol == "text":
+        return "text"
+
+    ser.write((COMPACT_HELLO + '\n').encode())
+    deadline = time.time() + PROTOCOL_NEGOTIATION_TIMEOUT
+    while time.time() < deadline:
+        if ser.in_waiting > 0:
+            response = ser.readline().decode().strip()
+            if response:
+                print(f"Arduino: {response}")
+            if COMPACT_ACK in response:
+                print("⚡ Using compact protocol.")
+                return "compact"
+            if "Invalid format" in response:
+                break
+        else:
+            time.sleep(0.01)
+    if protocol == "compact":
+        raise ProtocolError("Arduino did not acknowledge the compact protocol (no PROTO C OK)")
+    print("Arduino does not support the compact protocol, using text commands.")
+    return "text"
+
+
+def encode_for_protocol(command_lines, protocol):
+    """
+    Converts text command lines into what goes over the wire for protocol.
+    """
+    if protocol == "compact":
+        # Lines that don't parse are passed through, so the encoding stays 1:1 with command_lines
+        return encode_compact_commands([parse_command_line(cmd) or cmd for cmd in command_lines])
+    return list(command_lines)
+
+
+def stream_commands(ser, commands, on_sent=None, on_response=None):
+    """
+    Sends commands in batches whenever the Arduino sends REQUEST.
+    on_sent(index, total) is called after every command that goes out and
+    on_response(line) for every line the Arduino sends back.
+    """
+    command_index = 0
+    while command_index < len(commands):
+        if ser.in_waiting > 0:
+            response = ser.readline().decode().strip()
+            if response:
+                print(f"Arduino: {response}")
+                if on_response is not None:
+                    on_response(response)
+
+            # If Arduino requests more, send the next batch
+            if "REQUEST" in response:
+                print(f"--> Received REQUEST. Sending batch of up to {COMMAND_BATCH_SIZE} commands.")
+
+                for _ in range(COMMAND_BATCH_SIZE):
+                    if command_index < len(commands):
+                        cmd = commands[command_index]
+                        ser.write((cmd + '\n').encode())
+                        print(f"    Sent [{command_index + 1}/{len(commands)}]: {cmd}")
+                        command_index += 1
+                        if on_sent is not None:
+                            on_sent(command_index, len(commands))
+                        time.sleep(SEND_DELAY)
+                    else:
+                        break # No more commands left
+        else:
+            time.sleep(IDLE_POLL_DELAY)
+
+
+def stream_job(ser, commands, on_sent=None, on_response=None):
+    """
+    Streams one job and returns once the Arduino has finished all of it,
+    not just once it has buffered it: FINISH_MARKER goes out after the
+    commands, and since main.cpp only pops (and echoes) a command after the
+    previous move is done, the echo of the marker means the last move is
+    over. Returns False if the echoes stopped coming (ECHO_IDLE_TIMEOUT).
+    """
+    echoes = 0
+
+    def count_echoes(response):
+        nonlocal echoes
+        if response.startswith(ECHO_PREFIX):
+            echoes += 1
+        if on_response is not None:
+            on_response(response)
+
+    def report_sent(index, total):
+        if on_sent is not None and index < total:  # the marker is not part of the job
+            on_sent(index, total - 1)
+
+    commands = list(commands) + [FINISH_MARKER]
+    stream_commands(ser, commands, on_sent=report_sent, on_response=count_echoes)
+
+    last_activity = time.time()
+    while echoes < len(commands):
+        if ser.in_waiting > 0:
+            response = ser.readline().decode().strip()
+            last_activity = time.time()
+            if response:
+                print(f"Arduino (finishing): {response}")
+                count_echoes(response)
+        elif time.time() - last_activity > ECHO_IDLE_TIMEOUT:
+            print(f"⚠️ Only {echoes} of {len(commands)} commands were echoed, the robot stopped responding.")
+            return False
+        else:
+            time.sleep(IDLE_POLL_DELAY)
+    return True
+
+
+def wait_for_finish(ser, on_response=None):
+    """
+    Keeps the serial port open and listens for the final "REQUEST" signals,
+    which indicate the buffer is empty.
+    """
+    final_request_count = 0
+    while final_request_count < 2: # Wait for 2 more requests
+        if ser.in_waiting > 0:
+            response = ser.readline().decode().strip()
+            if response:
+                print(f"Arduino (finishing): {response}")
+                if on_response is not None:
+                    on_response(response)
+                if "REQUEST" in response:
+                    final_request_count += 1
+        else:
+            # If no response, assume Arduino is done
+            time.sleep(0.5)
+            if not ser.in_waiting > 0:
+                 break # Break if no activity
@@ -0,0 +1,244 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from pathlib import Path
+from scipy.spatial import cKDTree
+from svgpathtools import svg2paths2
+from svg_to_xy import split_svg_paths, _sample_raw_points_for_path
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+SVG_FILES_DIR = BASE_DIR / "data" / "svg_files"
+SIMILARITY_DIR = BASE_DIR / "data" / "similarity"
+SAMPLES_PER_SEGMENT = 10
+CLOUD_POINTS = 2048    # points per drawing for Hausdorff / chamfer (KD-tree queries)
+FRECHET_POINTS = 256   # points per drawing for discrete Frechet (O(n*m) table)
+FRECHET_BATCH = 32     # pairs per vectorized Frechet run (each needs n*m*16 bytes)
+METRICS = ("hausdorff", "chamfer", "frechet")
+AI_SUFFIX = "_AI"
+
+
+# --- LOADING ---
+
+def load_strokes(svg_path):
+    """
+    Samples every stroke of an SVG and normalizes the whole drawing into the
+    unit square (aspect ratio kept, flipped like svg_to_simplified_points_list
+    for "_AI" files), so drawings of any size compare in the same units.
+    Returns one (N, 2) array per stroke, in drawing order.
+    """
+    svg_path = Path(svg_path)
+    paths, _, _ = svg2paths2(svg_path)
+    strokes = [np.array(_sample_raw_points_for_path(path, SAMPLES_PER_SEGMENT)) for path in split_svg_paths(paths)]
+    strokes = [s for s in strokes if len(s)]
+    if not strokes:
+        return []
+
+    all_points = np.concatenate(strokes)
+    lo = all_points.min(axis=0)
+    size = (all_points.max(axis=0) - lo).max() or 1.0
+    normalized = [(s - lo) / size for s in strokes]
+    if AI_SUFFIX in svg_path.name:
+        height = (all_points[:, 1].max() - lo[1]) / size
+        for s in normalized:
+            s[:, 1] = height - s[:, 1]
+    return normalized
+
+
+def resample_strokes(strokes, count):
+    """
+    count points spread evenly by arc length along the strokes, in drawing
+    order. Pen-up jumps between strokes add no length, so dense and sparse
+    parts of a drawing get points in proportion to how much ink they have.
+    """
+    points = np.concatenate(strokes)
+    steps = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    # Zero out the jump from the last point of each stroke to the first of the next
+    stroke_ends = np.cumsum([len(s) for s in strokes])[:-1] - 1
+    steps[stroke_ends] = 0.0
+    arc = np.concatenate(([0.0], np.cumsum(steps)))
+    if arc[-1] == 0:
+        return np.repeat(points[:1], count, axis=0)
+
+    targets = np.linspace(0.0, arc[-1], count)
+    # side="right" keeps the sample on the stroke it belongs to at a zero-length jump
+    idx = np.clip(np.searchsorted(arc, targets, side="right") - 1, 0, len(points) - 2)
+    span = arc[idx + 1] - arc[idx]
+    t = np.divide(targets - arc[idx], span, out=np.zeros_like(targets), where=span > 0)[:, None]
+    return points[idx] + t * (points[idx + 1] - points[idx])
+
+
+class ShapeDescriptor:
+    """
+    The resampled point sets of one drawing plus its KD-tree, built once so
+    the all-pairs matrix does not rebuild them for every pair.
+    """
+    def __init__(self, svg_path):
+        self.name = Path(svg_path).name
+        strokes = load_strokes(svg_path)
+        if not strokes:
+            raise ValueError(f"{self.name} has no strokes")
+        self.cloud = resample_strokes(strokes, CLOUD_POINTS)
+        self.sequence = resample_strokes(strokes, FRECHET_POINTS)
+        self.tree = cKDTree(self.cloud)
+
+
+# --- DISTANCES ---
+
+def _nearest_distances(a, b):
+    # Distance from every point of a to the closest point of b
+    return b.tree.query(a.cloud)[0]
+
+
+def hausdorff_distance(a, b):
+    """
+    Symmetric Hausdorff distance: the worst-matched point of either drawing.
+    """
+    return float(max(_nearest_distances(a, b).max(), _nearest_distances(b, a).max()))
+
+
+def chamfer_distance(a, b):
+    """
+    Symmetric chamfer distance: the mean nearest-point distance, averaged
+    over both directions. Less sensitive to a single stray stroke than
+    Hausdorff.
+    """
+    return float((_nearest_distances(a, b).mean() + _nearest_distances(b, a).mean()) / 2)
+
+
+def discrete_frechet_distances(p, q):
+    """
+    Discrete Frechet distance (the "dog leash" distance, so drawing order
+    matters) between many pairs of ordered point sequences at once: p is
+    (pairs, n, 2), q is (pairs, m, 2). Each cell of the dynamic programming
+    table only depends on the two anti-diagonals before it, and in the
+    flattened (row-major) table an anti-diagonal is a plain slice with step
+    m - 1, so every diagonal of every pair is filled in one NumPy operation.
+    """
+    d = np.hypot(p[:, :, None, 0] - q[:, None, :, 0], p[:, :, None, 1] - q[:, None, :, 1])
+    _, n, m = d.shape
+    ca = np.empty_like(d)
+    # First column and first row have a single way in
+    ca[:, :, 0] = np.maximum.accumulate(d[:, :, 0], axis=1)
+    ca[:, 0, :] = np.maximum.accumulate(d[:, 0, :], axis=1)
+    if n > 1 and m > 1:
+        flat_d = d.reshape(len(d), -1)
+        flat_ca = ca.reshape(len(ca), -1)
+        step = m - 1
+        for k in range(2, n + m - 1):
+            # Interior cells (i, k - i) with i, j >= 1; cell (i, j) is at i * m + j
+            first, last = max(1, k - m + 1), min(k - 1, n - 1)
+            start, stop = first * m + k - first, last * m + k - last + 1
+            up = flat_ca[:, start - m:stop - m:step]
+            left = flat_ca[:, start - 1:stop - 1:step]
+            diagonal = flat_ca[:, start - m - 1:stop - m - 1:step]
+            best_prev = np.minimum(np.minimum(up, left), diagonal)
+            flat_ca[:, start:stop:step] = np.maximum(flat_d[:, start:stop:step], best_prev)
+    return ca[:, -1, -1]
+
+
+def discrete_frechet_distance(p, q):
+    return float(discrete_frechet_distances(np.asarray(p)[None], np.asarray(q)[None])[0])
+
+
+def _batch_distances(batch):
+    # Both point-set metrics come from the same two nearest-neighbour queries
+    results = []
+    for a, b in batch:
+        a_to_b, b_to_a = _nearest_distances(a, b), _nearest_distances(b, a)
+        results.append({"hausdorff": float(max(a_to_b.max(), b_to_a.max())),
+                        "chamfer": float((a_to_b.mean() + b_to_a.mean()) / 2)})
+    frechet = discrete_frechet_distances(np.stack([a.sequence for a, _ in batch]),
+                                         np.stack([b.sequence for _, b in batch]))
+    for result, value in zip(results, frechet):
+        result["frechet"] = float(value)
+    return results
+
+
+def shape_distances(pairs, batch_size=FRECHET_BATCH, workers=None):
+    """
+    Hausdorff, chamfer and Frechet distance for every (a, b) descriptor pair,
+    as a list of dicts. Pairs are processed batch_size at a time, the
+    batches in parallel when there is more than one.
+    """
+    batches = [pairs[start:start + batch_size] for start in range(0, len(pairs), batch_size)]
+    if len(batches) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batch_results = list(pool.map(_batch_distances, batches))
+    else:
+        batch_results = [_batch_distances(batch) for batch in batches]
+    return [result for results in batch_results for result in results]
+
+
+# --- CORPUS ---
+
+def find_stimulus_pairs(svg_dir=SVG_FILES_DIR):
+    """
+    Returns (stimulus, human_svg, ai_svg) for every <name>.svg that has a
+    matching <name>_AI.svg in svg_dir.
+    """
+    svg_dir = Path(svg_dir)
+    pairs = []
+    for ai_path in sorted(svg_dir.glob(f"*{AI_SUFFIX}.svg")):
+        stimulus = ai_path.name[:-len(f"{AI_SUFFIX}.svg")]
+        human_path = svg_dir / f"{stimulus}.svg"
+        if human_path.exists():
+            pairs.append((stimulus, human_path.name, ai_path.name))
+    return pairs
+
+
+def load_descriptors(svg_filenames, svg_dir=SVG_FILES_DIR):
+    return {name: ShapeDescriptor(Path(svg_dir) / name) for name in svg_filenames}
+
+
+def pair_similarity(svg_dir=SVG_FILES_DIR, descriptors=None):
+    """
+    One row per human/AI stimulus pair with its Hausdorff, chamfer and
+    Frechet distances (unit-square units), keyed by stimulus name for
+    joining with the survey ratings.
+    """
+    pairs = find_stimulus_pairs(svg_dir)
+    if descriptors is None:
+        descriptors = load_descriptors([name for pair in pairs for name in pair[1:]], svg_dir)
+    distances = shape_distances([(descriptors[human], descriptors[ai]) for _, human, ai in pairs])
+    rows = [{"stimulus": stimulus, "human_svg": human, "ai_svg": ai, **dist}
+            for (stimulus, human, ai), dist in zip(pairs, distances)]
+    return pd.DataFrame(rows, columns=["stimulus", "human_svg", "ai_svg", *METRICS])
+
+
+def similarity_matrix(svg_dir=SVG_FILES_DIR, descriptors=None, workers=None):
+    """
+    All-pairs distance matrices for every SVG in svg_dir, one DataFrame per
+    metric (symmetric, zero diagonal). Each drawing is loaded and indexed
+    once; every pair is computed once.
+    """
+    if descriptors is None:
+        descriptors = load_descriptors(sorted(p.name for p in Path(svg_dir).glob("*.svg")), svg_dir)
+    names = sorted(descriptors)
+    index_pairs = [(i, j) for i in range(len(names)) for j in range(i + 1, len(names))]
+    distances = shape_distances([(descriptors[names[i]], descriptors[names[j]]) for i, j in index_pairs],
+                                workers=workers)
+    matrices = {metric: np.zeros((len(names), len(names))) for metric in METRICS}
+    for (i, j), dist in zip(index_pairs, distances):
+        for metric, value in dist.items():
+            matrices[metric][i, j] = matrices[metric][j, i] = value
+    return {metric: pd.DataFrame(m, index=names, columns=names) for metric, m in matrices.items()}
+
+
+def export_similarity(svg_dir=SVG_FILES_DIR, out_dir=SIMILARITY_DIR, workers=None):
+    """
+    Writes pair_similarity.csv (one row per human/AI pair) and
+    similarity_matrix_<metric>.csv (all pairs) into out_dir. Returns the
+    pair table.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    descriptors = load_descriptors(sorted(p.name for p in Path(svg_dir).glob("*.svg")), svg_dir)
+
+    pairs = pair_similarity(svg_dir, descriptors)
+    pairs.to_csv(out_dir / "pair_similarity.csv", index=False)
+    for metric, matrix in similarity_matrix(svg_dir, descriptors, workers).items():
+        matrix.to_csv(out_dir / f"similarity_matrix_{metric}.csv")
+
+    print(f"✅ Similarity of {len(pairs)} human/AI pairs and {len(descriptors)} drawings written to {out_dir}")
+    return pairs
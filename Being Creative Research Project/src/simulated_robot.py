@@ -0,0 +1,78 @@
+import os
+import select
+import threading
+import time
+
+# --- Constants ---
+# These should match the constants in main.cpp
+BUFFER_SIZE = 10
+BUFFER_LOW_THRESHOLD = 3
+REQUEST_INTERVAL = 0.3  # seconds between "REQUEST" signals
+
+
+class SimulatedRobot:
+    """
+    Stand-in for the Arduino on a pseudo-terminal (POSIX only), for trying
+    the streamer, plot server and fleet without hardware. Speaks the same
+    line protocol as main.cpp: REQUEST when the buffer is low, a
+    "Processing command:" echo per command, and "PROTO C" negotiation.
+    command_delay is how long every command takes to "draw".
+    """
+    def __init__(self, command_delay=0.01, compact_support=True):
+        import pty
+        import tty
+
+        self.command_delay = command_delay
+        self.compact_support = compact_support
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.processed = []
+        self._buffer = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _write(self, line):
+        os.write(self.master, (line + "\r\n").encode())
+
+    def _run(self):
+        pending = b""
+        last_request = 0.0
+        busy_until = 0.0
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self.master], [], [], 0.005)
+            if ready:
+                pending += os.read(self.master, 1024)
+                while b"\n" in pending:
+                    line, pending = pending.split(b"\n", 1)
+                    line = line.decode().strip()
+                    if not line:
+                        continue
+                    if len(self._buffer) < BUFFER_SIZE - 1:
+                        self._buffer.append(line)
+                    else:
+                        self._write("BUFFER FULL")
+
+            now = time.monotonic()
+            if self._buffer and now >= busy_until:
+                cmd = self._buffer.pop(0)
+                self._write(f"Processing command: {cmd}")
+                if cmd == "PROTO C":
+                    self._write("PROTO C OK" if self.compact_support else f"Invalid format: {cmd}")
+                else:
+                    self.processed.append(cmd)
+                busy_until = now + self.command_delay
+
+            if len(self._buffer) <= BUFFER_LOW_THRESHOLD and now - last_request > REQUEST_INTERVAL:
+                self._write("REQUEST")
+                last_request = now
@@ -2,11 +2,19 @@ import numpy as np
 from rdp import rdp
 from svgpathtools import svg2paths2, Path as svgPath
 from pathlib import Path
+import heapq
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from profiler import NULL_PROFILER
 
 # --- GLOBAL CONFIGURATION ---
 RDP_TOLERANCE = 5.0 
 SAMPLES_PER_SEGMENT = 20
+# Drawings with fewer raw samples than this are simplified in-process (a pool costs more than it saves)
+PARALLEL_MIN_POINTS = 20000
+CHUNKS_PER_WORKER = 4  # more, smaller batches than workers so one slow batch does not hold up the rest
 
 # NOTE: Assuming BASE_DIR is set up in your main environment to point to the root
 BASE_DIR = Path(__file__).parent.parent
@@ -50,12 +58,156 @@ def _sample_raw_points_for_path(path_list, samples_per_segment):
     return raw_stroke_points
 
 
+# --- PARALLEL STROKE SIMPLIFICATION ---
+
+def _raw_sample_count(path_list, samples_per_segment):
+    # Number of points _sample_raw_points_for_path returns, known before sampling
+    return len(path_list) * samples_per_segment + 1 if len(path_list) else 0
+
+
+def _stroke_metrics(path, simplified_count, samples_per_segment, rdp_tolerance):
+    """
+    (length, standardized node count) of one stroke for
+    calculate_standardized_metrics. The node count is taken from the compile
+    pass when it ran at the standard settings, else the stroke is simplified
+    once more at SAMPLES_PER_SEGMENT / RDP_TOLERANCE.
+    """
+    if (samples_per_segment, rdp_tolerance) == (SAMPLES_PER_SEGMENT, RDP_TOLERANCE):
+        node_count = simplified_count
+    else:
+        node_count = len(simplify_polyline_rdp(_sample_raw_points_for_path(path, SAMPLES_PER_SEGMENT), RDP_TOLERANCE))
+    return path.length(), node_count
+
+
+def _balanced_batches(weights, batch_count):
+    """
+    Splits stroke indices into at most batch_count batches of roughly equal
+    total weight (largest stroke first into the lightest batch).
+    """
+    batches = [[] for _ in range(batch_count)]
+    loads = [(0, b) for b in range(batch_count)]
+    for i in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        load, b = heapq.heappop(loads)
+        batches[b].append(i)
+        heapq.heappush(loads, (load + weights[i], b))
+    return [sorted(batch) for batch in batches if batch]
+
+
+def _simplify_stroke_batch(args):
+    """
+    Worker: samples and simplifies a batch of strokes, writing each result
+    into its own slot of the shared output buffer. Returns the stroke
+    indices, how many points each kept and (if with_metrics) their
+    _stroke_metrics.
+    """
+    shm_name, total, strokes, offsets, indices, samples_per_segment, rdp_tolerance, with_metrics = args
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((total, 2), dtype=np.float64, buffer=shm.buf)
+        counts = []
+        metrics = []
+        for path, offset in zip(strokes, offsets):
+            raw_stroke_points = _sample_raw_points_for_path(path, samples_per_segment)
+            simplified = rdp(np.array(raw_stroke_points), epsilon=rdp_tolerance) if raw_stroke_points else ()
+            out[offset:offset + len(simplified)] = simplified
+            counts.append(len(simplified))
+            if with_metrics:
+                metrics.append(_stroke_metrics(path, len(simplified), samples_per_segment, rdp_tolerance))
+        del out  # release the buffer before closing
+    finally:
+        shm.close()
+    return indices, counts, metrics
+
+
+def _simplify_strokes_parallel(split_paths, raw_counts, samples_per_segment, rdp_tolerance, workers,
+                               with_metrics=False):
+    """
+    Same result as sampling and simplifying every stroke in turn, but with
+    the strokes spread over a process pool in balanced batches. Every
+    stroke gets a slot the size of its raw sample count in one shared-memory
+    array, so the points come back without pickling and are reassembled in
+    the original order with a (None, None) after each stroke.
+    Returns (points, per-stroke _stroke_metrics or None).
+    """
+    offsets = np.concatenate(([0], np.cumsum(raw_counts)[:-1])).tolist()
+    total = sum(raw_counts)
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * 2 * np.dtype(np.float64).itemsize)
+    try:
+        batches = _balanced_batches(raw_counts, workers * CHUNKS_PER_WORKER)
+        jobs = [(shm.name, total, [split_paths[i] for i in batch], [offsets[i] for i in batch], batch,
+                 samples_per_segment, rdp_tolerance, with_metrics) for batch in batches]
+        counts = [0] * len(split_paths)
+        metrics = [None] * len(split_paths) if with_metrics else None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for indices, batch_counts, batch_metrics in pool.map(_simplify_stroke_batch, jobs):
+                for i, count in zip(indices, batch_counts):
+                    counts[i] = count
+                for i, stroke_metrics in zip(indices, batch_metrics):
+                    metrics[i] = stroke_metrics
+
+        out = np.ndarray((total, 2), dtype=np.float64, buffer=shm.buf)
+        simplified_points = []
+        for offset, count in zip(offsets, counts):
+            simplified_points.extend(map(tuple, out[offset:offset + count].tolist()))
+            simplified_points.append((None, None))  # Separator between paths
+        del out
+    finally:
+        shm.close()
+        shm.unlink()
+    return simplified_points, metrics
+
+
+def _simplify_strokes(split_paths, samples_per_segment, rdp_tolerance, workers, with_metrics, profiler):
+    """
+    Samples and simplifies every stroke, on a pool of workers for large
+    drawings. Returns (points with a (None, None) after each stroke,
+    per-stroke _stroke_metrics or None).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    raw_counts = [_raw_sample_count(path, samples_per_segment) for path in split_paths]
+    if workers > 1 and sum(raw_counts) >= PARALLEL_MIN_POINTS:
+        with profiler.stage("parallel_sampling_rdp", points_in=sum(raw_counts)) as stage:
+            simplified_points, metrics = _simplify_strokes_parallel(split_paths, raw_counts, samples_per_segment,
+                                                                    rdp_tolerance, workers, with_metrics)
+            stage.points_out = len(simplified_points) - len(split_paths)
+        return simplified_points, metrics
+
+    simplified_points = []
+    metrics = [] if with_metrics else None
+    for path in split_paths:
+        with profiler.stage("sampling", points_in=len(path)) as stage:
+            raw_stroke_points = _sample_raw_points_for_path(path, samples_per_segment)
+            stage.points_out = len(raw_stroke_points)
+        with profiler.stage("rdp", points_in=len(raw_stroke_points)) as stage:
+            simplified_stroke_points = simplify_polyline_rdp(raw_stroke_points, rdp_tolerance)
+            stage.points_out = len(simplified_stroke_points)
+        if with_metrics:
+            with profiler.stage("stroke_metrics", points_in=len(path)):
+                metrics.append(_stroke_metrics(path, len(simplified_stroke_points), samples_per_segment,
+                                               rdp_tolerance))
+
+        simplified_points.extend(simplified_stroke_points)
+        simplified_points.append((None, None))  # Separator between paths
+    return simplified_points, metrics
+
+
+def _summarize_metrics(stroke_metrics):
+    return {
+        "total_path_length": sum(length for length, _ in stroke_metrics),
+        "stroke_count": len(stroke_metrics),
+        "standardized_node_count": sum(count for _, count in stroke_metrics),
+    }
+
+
 # --- MAIN METRICS FUNCTION (RETAINED) ---
 
-def calculate_standardized_metrics(svg_path_name):
+def calculate_standardized_metrics(svg_path_name, workers=None):
     """
     Calculates key complexity metrics, including a standardized node count 
     obtained via RDP simplification. (No coordinate flip needed here.)
+    Large drawings use the same stroke pool as svg_to_simplified_points_list;
+    when compiling, pass with_metrics=True to that instead of calling both.
     """
     svg_file_path = BASE_DIR / "data" / "svg_files" / svg_path_name
     
@@ -70,32 +222,24 @@ def calculate_standardized_metrics(svg_path_name):
         }
 
     split_paths = split_svg_paths(paths) 
-    
-    total_length = 0.0
-    standardized_node_count = 0
-    stroke_count = len(split_paths)
-
-    for path in split_paths:
-        total_length += path.length()
-        raw_stroke_points = _sample_raw_points_for_path(path, SAMPLES_PER_SEGMENT)
-        simplified_points = simplify_polyline_rdp(raw_stroke_points, RDP_TOLERANCE)
-        standardized_node_count += len(simplified_points)
-
-    return {
-        "total_path_length": total_length,
-        "stroke_count": stroke_count,
-        "standardized_node_count": standardized_node_count
-    }
+    _, stroke_metrics = _simplify_strokes(split_paths, SAMPLES_PER_SEGMENT, RDP_TOLERANCE, workers,
+                                          with_metrics=True, profiler=NULL_PROFILER)
+    return _summarize_metrics(stroke_metrics)
 
 
 # --- MAIN POINT GENERATION FUNCTION (UPDATED) ---
 
-def svg_to_simplified_points_list(svg_path, samples_per_segment, arm_L1, arm_L2, margin):
+def svg_to_simplified_points_list(svg_path, samples_per_segment, arm_L1, arm_L2, margin, rdp_tolerance=RDP_TOLERANCE, profiler=NULL_PROFILER, workers=None, with_metrics=False):
     '''
     Convert an SVG file to a list of (x, y) coordinates. Paths are simplified 
     using RDP to standardize complexity before scaling/translation.
     
     The Y-axis is automatically inverted if the filename contains '_AI'.
+    Pass a profiler from profiler.make_profiler to time each stage.
+    Large drawings are sampled and simplified on a pool of workers processes
+    (default: one per CPU, workers=1 keeps everything in this process).
+    with_metrics=True returns (points, calculate_standardized_metrics result),
+    computed in the same pass over the strokes.
     '''
     svg_file_path = BASE_DIR / "data" / "svg_files" / svg_path
     
@@ -104,25 +248,29 @@ def svg_to_simplified_points_list(svg_path, samples_per_segment, arm_L1, arm_L2,
     invert_y = "_AI" in svg_path
     # -----------------------------------
     
-    paths, attributes, svg_attributes = svg2paths2(svg_file_path)
-    split_paths = split_svg_paths(paths)
+    with profiler.stage("svg2paths2") as stage:
+        paths, attributes, svg_attributes = svg2paths2(svg_file_path)
+        stage.points_out = sum(len(path) for path in paths)
+    with profiler.stage("split_svg_paths", points_in=stage.points_out) as stage:
+        split_paths = split_svg_paths(paths)
+        stage.points_out = len(split_paths)
 
     # --- Collect simplified points ---
-    simplified_points = []
-    
-    for path in split_paths:
-        raw_stroke_points = _sample_raw_points_for_path(path, samples_per_segment)
-        simplified_stroke_points = simplify_polyline_rdp(raw_stroke_points, RDP_TOLERANCE)
-        
-        simplified_points.extend(simplified_stroke_points)
-        simplified_points.append((None, None))  # Separator between paths
+    simplified_points, stroke_metrics = _simplify_strokes(split_paths, samples_per_segment, rdp_tolerance, workers,
+                                                          with_metrics, profiler)
 
     # --- Scale and move to fit on paper ---
-    scaled_points = normalize_and_scale_points(simplified_points, arm_L1 * 0.9, arm_L2 * 0.9, margin, invert_y)
+    with profiler.stage("normalize_and_scale_points", points_in=len(simplified_points)) as stage:
+        scaled_points = normalize_and_scale_points(simplified_points, arm_L1 * 0.9, arm_L2 * 0.9, margin, invert_y)
+        stage.points_out = len(scaled_points)
 
     # Add pen down/up instructions for robot
-    scaled_points = add_pen_down_none_tuples(scaled_points)
-    scaled_points.append((None, None))
+    with profiler.stage("add_pen_down_none_tuples", points_in=len(scaled_points)) as stage:
+        scaled_points = add_pen_down_none_tuples(scaled_points)
+        scaled_points.append((None, None))
+        stage.points_out = len(scaled_points)
+    if with_metrics:
+        return scaled_points, _summarize_metrics(stroke_metrics)
     return scaled_points
 
 
@@ -155,6 +303,43 @@ def split_svg_paths(paths):
     return split_paths
 
 
+def xy_points_to_strokes(points_list):
+    """
+    Splits a list of (x, y) coordinates into pen-down strokes.
+
+    Follows the same pen convention as generate_commands: the first point is a
+    pen-up travel move, the pen goes down after it, and every (None, None)
+    toggles the pen.
+
+    Returns:
+        list: One (N, 2) numpy array per stroke.
+    """
+    strokes = []
+    current_stroke = []
+    last_point = None
+    is_down = False
+    started = False
+
+    for point in points_list:
+        if point == (None, None) or not isinstance(point, tuple):
+            if is_down and current_stroke:
+                strokes.append(np.array(current_stroke, dtype=float))
+            is_down = not is_down
+            current_stroke = [last_point] if is_down and last_point is not None else []
+            continue
+
+        current_stroke.append(point)
+        last_point = point
+        if not started:
+            # Mirror generate_commands: "PEN DOWN" comes right after the first point
+            started = True
+            is_down = True
+
+    if is_down and current_stroke:
+        strokes.append(np.array(current_stroke, dtype=float))
+    return strokes
+
+
 def add_pen_down_none_tuples(points):
     none_indices = []
     for i in range(len(points)):
@@ -0,0 +1,227 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from command_generator import (file_sha256, generate_commands, generate_commands_file, write_lines_atomic,
+                               load_compile_settings)
+
+# --- CONFIGURATION ---
+BASE_DIR = Path(__file__).parent.parent
+SVG_FILES_DIR = BASE_DIR / "data" / "svg_files"
+XY_FILE_STORAGE_DIR = BASE_DIR / "data" / "xy_file_storage"
+COMMAND_FILE_STORAGE_DIR = BASE_DIR / "data" / "command_file_storage"
+MANIFEST_FILE = BASE_DIR / "data" / "compile_manifest.json"
+WATCH_INTERVAL = 1.0  # seconds between scans of the SVG directory
+MARGIN = 2
+
+
+def xy_output_path(svg_filename, xy_dir=XY_FILE_STORAGE_DIR):
+    return Path(xy_dir) / f"output_{svg_filename}.txt"
+
+
+def command_output_path(svg_filename, command_dir=COMMAND_FILE_STORAGE_DIR):
+    return Path(command_dir) / f"commands_{svg_filename}.txt"
+
+
+def resolve_compile_params(svg_filename, l1, l2, samples_per_segment=None, rdp_tolerance=None, line_tolerance=None,
+                           default_samples_per_segment=None):
+    """
+    The settings an SVG is compiled with, resolved the same way as
+    main.generate_robot_command_from_svg: explicit values, then the tuned
+    values in compile_settings.json, then default_samples_per_segment and
+    the global defaults.
+    """
+    from svg_to_xy import RDP_TOLERANCE, SAMPLES_PER_SEGMENT
+    from joint_densify import servo_step_tolerance
+
+    tuned = load_compile_settings(svg_filename)
+    return {
+        "l1": l1,
+        "l2": l2,
+        "margin": MARGIN,
+        "samples_per_segment": samples_per_segment if samples_per_segment is not None
+                               else tuned.get("samples_per_segment", default_samples_per_segment or SAMPLES_PER_SEGMENT),
+        "rdp_tolerance": rdp_tolerance if rdp_tolerance is not None
+                         else tuned.get("rdp_tolerance", RDP_TOLERANCE),
+        "line_tolerance": line_tolerance if line_tolerance is not None else servo_step_tolerance(l2),
+    }
+
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest(manifest_path=MANIFEST_FILE):
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(manifest, manifest_path=MANIFEST_FILE):
+    # Same temp-file-and-rename as the checkpoints, so a crash never leaves a broken manifest
+    manifest_path = Path(manifest_path)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def scan_svg_directory(svg_dir, manifest):
+    """
+    Returns {svg_filename: (size, mtime_ns, sha256)} for every SVG in svg_dir.
+    Files whose size and mtime match the manifest keep their recorded hash,
+    so an idle poll does not re-read the whole corpus.
+    """
+    found = {}
+    for path in Path(svg_dir).glob("*.svg"):
+        try:
+            stat = path.stat()
+            entry = manifest.get(path.name)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                digest = entry["sha256"]
+            else:
+                digest = file_sha256(path)
+        except FileNotFoundError:
+            continue  # renamed or deleted since the glob; the next scan sees it as removed
+        found[path.name] = (stat.st_size, stat.st_mtime_ns, digest)
+    return found
+
+
+def compile_svg(svg_filename, params, svg_dir=SVG_FILES_DIR, xy_dir=XY_FILE_STORAGE_DIR,
+                command_dir=COMMAND_FILE_STORAGE_DIR, stroke_workers=None):
+    """
+    Compiles one SVG into its xy file and command file, both written
+    atomically. Returns (points, commands) counts. stroke_workers is passed
+    on to svg_to_simplified_points_list as workers.
+    """
+    from svg_to_xy import svg_to_simplified_points_list
+    from joint_densify import densify_for_joint_interpolation
+
+    # An absolute path passes straight through the svg_files lookup in svg_to_xy
+    svg_path = str(Path(svg_dir).resolve() / svg_filename)
+    points = svg_to_simplified_points_list(svg_path, params["samples_per_segment"], params["l1"], params["l2"],
+                                           params["margin"], rdp_tolerance=params["rdp_tolerance"],
+                                           workers=stroke_workers)
+    if params["line_tolerance"]:
+        points, _ = densify_for_joint_interpolation(points, params["l1"], params["l2"], params["line_tolerance"])
+    command_list = generate_commands(points, params["l1"], params["l2"])
+    write_lines_atomic(xy_output_path(svg_filename, xy_dir), points)
+    generate_commands_file(command_list, svg_filename, out_dir=command_dir)
+    return len(points), len(command_list)
+
+
+def _compile_svg_quietly(args):
+    # Worker entry point: keep the per-file prints of svg_to_xy out of the watch log
+    svg_filename = args[0]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return svg_filename, compile_svg(*args), None
+    except Exception as e:
+        return svg_filename, None, f"{type(e).__name__}: {e}"
+
+
+def remove_outputs(svg_filename, xy_dir=XY_FILE_STORAGE_DIR, command_dir=COMMAND_FILE_STORAGE_DIR):
+    removed = []
+    for path in (xy_output_path(svg_filename, xy_dir), command_output_path(svg_filename, command_dir)):
+        if path.exists():
+            path.unlink()
+            removed.append(path.name)
+    return removed
+
+
+def sync_outputs(l1=13, l2=12.5, samples_per_segment=None, rdp_tolerance=None, svg_dir=SVG_FILES_DIR,
+                 xy_dir=XY_FILE_STORAGE_DIR, command_dir=COMMAND_FILE_STORAGE_DIR,
+                 manifest_path=MANIFEST_FILE, workers=None, line_tolerance=None, default_samples_per_segment=None):
+    """
+    One incremental build: recompiles every SVG in svg_dir whose content or
+    compile settings changed since the manifest was written (or whose
+    outputs went missing), and deletes the outputs of SVGs that were
+    removed. Returns {"compiled", "failed", "removed", "unchanged"}.
+    """
+    manifest = load_manifest(manifest_path)
+    found = scan_svg_directory(svg_dir, manifest)
+    result = {"compiled": [], "failed": [], "removed": [], "unchanged": 0}
+
+    # --- Removed SVGs ---
+    # Only outputs the manifest knows we wrote are pruned; hand-made files in the storage dirs stay
+    for name in sorted(set(manifest) - set(found)):
+        result["removed"].extend(remove_outputs(name, xy_dir, command_dir))
+        del manifest[name]
+
+    # --- Added / changed SVGs ---
+    jobs = []
+    for name, (size, mtime_ns, digest) in sorted(found.items()):
+        params = resolve_compile_params(name, l1, l2, samples_per_segment, rdp_tolerance, line_tolerance,
+                                        default_samples_per_segment)
+        entry = manifest.get(name)
+        up_to_date = (
+            entry is not None
+            and entry["sha256"] == digest
+            and entry["params_hash"] == params_hash(params)
+            and (entry.get("error") is not None or (xy_output_path(name, xy_dir).exists()
+                                                    and command_output_path(name, command_dir).exists()))
+        )
+        if up_to_date:
+            # Refresh the stat info so a touched-but-identical file is not re-hashed next time
+            entry.update(size=size, mtime_ns=mtime_ns)
+            result["unchanged"] += 1
+            continue
+        manifest[name] = {"size": size, "mtime_ns": mtime_ns, "sha256": digest,
+                          "params": params, "params_hash": params_hash(params)}
+        jobs.append((name, params, svg_dir, xy_dir, command_dir))
+
+    if len(jobs) > 1 and workers != 1:
+        # One file per process; a single changed file gets the stroke-level pool instead
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_compile_svg_quietly, [job + (1,) for job in jobs]))
+    else:
+        outcomes = [_compile_svg_quietly(job + (workers,)) for job in jobs]
+
+    for name, counts, error in outcomes:
+        # A failed file keeps its hash, so it is retried only once it (or the settings) change
+        manifest[name]["error"] = error
+        if error is None:
+            manifest[name]["points"], manifest[name]["commands"] = counts
+            result["compiled"].append(name)
+        else:
+            # Outputs of the previous version no longer match the SVG, don't leave them to be streamed
+            remove_outputs(name, xy_dir, command_dir)
+            result["failed"].append((name, error))
+
+    save_manifest(manifest, manifest_path)
+    return result
+
+
+def watch_svg_directory(l1=13, l2=12.5, samples_per_segment=None, rdp_tolerance=None, svg_dir=SVG_FILES_DIR,
+                        xy_dir=XY_FILE_STORAGE_DIR, command_dir=COMMAND_FILE_STORAGE_DIR,
+                        manifest_path=MANIFEST_FILE, interval=WATCH_INTERVAL, workers=None, once=False,
+                        line_tolerance=None, default_samples_per_segment=None):
+    """
+    Polls svg_dir and keeps xy_file_storage / command_file_storage in sync
+    with it until Ctrl-C (or after one pass if once is set).
+    """
+    print(f"👀 Watching {svg_dir} (every {interval:.1f} s, Ctrl-C to stop)")
+    try:
+        while True:
+            start = time.perf_counter()
+            result = sync_outputs(l1, l2, samples_per_segment, rdp_tolerance, svg_dir, xy_dir,
+                                  command_dir, manifest_path, workers, line_tolerance, default_samples_per_segment)
+            for name in result["compiled"]:
+                print(f"✅ Compiled {name}")
+            for name, error in result["failed"]:
+                print(f"❌ Error compiling {name}: {error}")
+            for name in result["removed"]:
+                print(f"🗑️  Removed stale {name}")
+            if result["compiled"] or result["failed"] or result["removed"]:
+                print(f"   ({result['unchanged']} unchanged, {time.perf_counter() - start:.2f} s)")
+            if once:
+                return result
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n🛑 Watch stopped by user.")
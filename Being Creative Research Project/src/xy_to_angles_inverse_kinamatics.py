@@ -1,5 +1,21 @@
 import math
 
+# --- JOINT LIMITS ---
+# These should match SHOULDER_*/ELBOW_* in main.cpp (servo angles, degrees)
+SHOULDER_MIN_ANGLE = -180.0
+SHOULDER_MAX_ANGLE = 270.0
+ELBOW_MIN_ANGLE = -65.0
+ELBOW_MAX_ANGLE = 245.0
+# angle_to_us in main.cpp clamps every command to 0..180, so that is all the servos reach
+SERVO_MIN_ANGLE = 0.0
+SERVO_MAX_ANGLE = 180.0
+# Pose the arm homes to in setup()
+HOME_ANGLES = (90.0, 90.0)
+# Joint travel (degrees) a point has to save before compute_joint_angle_path
+# draws it on the other elbow branch than compute_joint_angles would.
+# Both branches are within the servo range, so by default nothing is charged.
+BRANCH_SWITCH_PENALTY = 0.0
+
 def radians_to_degrees(rad):
     """
     Convert radians to degrees.
@@ -31,6 +47,114 @@ def compute_joint_angles(x, y, l1, l2):
         print(f"An unexpected error occurred during IK: {e}")
         return (None, None)
 
+def compute_joint_angle_candidates(x, y, l1, l2):
+    """
+    Returns every (shoulder, elbow) servo pose that reaches (x, y) within the
+    joint limits and the 0..180 servo range, one per elbow branch. Empty if
+    the point is unreachable.
+    """
+    shoulder_min, shoulder_max = max(SHOULDER_MIN_ANGLE, SERVO_MIN_ANGLE), min(SHOULDER_MAX_ANGLE, SERVO_MAX_ANGLE)
+    elbow_min, elbow_max = max(ELBOW_MIN_ANGLE, SERVO_MIN_ANGLE), min(ELBOW_MAX_ANGLE, SERVO_MAX_ANGLE)
+    cos_elbow = (x**2 + y**2 - l1**2 - l2**2) / (2 * l1 * l2)
+    if cos_elbow > 1.0 or cos_elbow < -1.0:
+        return []
+
+    candidates = []
+    elbow_rad = math.acos(cos_elbow)
+    for q2 in {elbow_rad, -elbow_rad}:  # set: straight arm has a single branch
+        elbow_angle = radians_to_degrees(q2) + 90.0  # Adjust for servo mapping
+        if not elbow_min <= elbow_angle <= elbow_max:
+            continue
+        shoulder_angle = radians_to_degrees(math.atan2(y, x) - math.atan2(l2 * math.sin(q2), l1 + l2 * math.cos(q2)))
+        shoulder_angle %= 360.0  # the servo range is under a full turn, so at most one wrap fits
+        if shoulder_min <= shoulder_angle <= shoulder_max:
+            candidates.append((shoulder_angle, elbow_angle))
+    return candidates
+
+def compute_joint_angle_path(xypoints, l1, l2, start=HOME_ANGLES, branch_penalty=BRANCH_SWITCH_PENALTY):
+    """
+    Inverse kinematics for a whole point list, choosing per point between the
+    elbow branches so that the total joint travel
+    sum(max(|d_shoulder|, |d_elbow|)) is minimal. The firmware's move time
+    scales with the largest joint delta, so this is the drawing time.
+
+    Every point drawn on the other elbow branch than compute_joint_angles
+    (elbow below 90) costs branch_penalty degrees extra (default 0: the
+    plain minimum). A positive value keeps a drawing on the usual branch
+    unless leaving it saves more than that per point.
+
+    Solved with dynamic programming over the points, starting from start.
+
+    Parameters:
+    xypoints (list): (x, y) tuples with (None, None) pen markers, as returned by svg_to_simplified_points_list.
+    branch_penalty (float): Extra cost in degrees per point on the other elbow branch.
+
+    Returns:
+    list: One (shoulder, elbow) tuple per entry of xypoints; (None, None)
+          for pen markers and unreachable points.
+    """
+    import numpy as np  # imported here so streaming, which only needs HOME_ANGLES, starts fast
+
+    angles = [(None, None)] * len(xypoints)
+    indices = []
+    candidate_lists = []
+    for i, (x, y) in enumerate(xypoints):
+        if x is None or y is None:
+            continue
+        candidates = compute_joint_angle_candidates(x, y, l1, l2)
+        if candidates:
+            indices.append(i)
+            candidate_lists.append(candidates)
+    if not indices:
+        return angles
+
+    # Candidates padded to a fixed width with NaN (never chosen)
+    width = max(len(c) for c in candidate_lists)
+    table = np.full((len(indices), width, 2), np.nan)
+    for row, candidates in enumerate(candidate_lists):
+        table[row, :len(candidates)] = candidates
+
+    # compute_joint_angles always takes the +acos branch, i.e. elbow >= 90
+    penalty = np.where(table[:, :, 1] < 90.0, branch_penalty, 0.0)
+
+    cost = np.max(np.abs(table[0] - np.asarray(start, dtype=float)), axis=1) + penalty[0]
+    cost = np.where(np.isnan(cost), np.inf, cost)
+    back = np.zeros((len(indices), width), dtype=int)
+    for row in range(1, len(indices)):
+        # step[prev, next] = max joint delta between candidate poses
+        step = np.max(np.abs(table[row - 1][:, None, :] - table[row][None, :, :]), axis=2) + penalty[row]
+        total = cost[:, None] + np.where(np.isnan(step), np.inf, step)
+        back[row] = np.argmin(total, axis=0)
+        cost = total[back[row], np.arange(width)]
+
+    choice = int(np.argmin(cost))
+    for row in range(len(indices) - 1, -1, -1):
+        shoulder, elbow = table[row, choice]
+        angles[indices[row]] = (float(shoulder), float(elbow))
+        choice = back[row, choice]
+    return angles
+
+def forward_kinematics(shoulder_angles, elbow_angles, l1, l2):
+    """
+    Vectorized forward kinematics, the inverse of compute_joint_angles.
+
+    Parameters:
+    shoulder_angles (array-like): Shoulder servo angles in degrees.
+    elbow_angles (array-like): Elbow servo angles in degrees (including the +90 servo offset).
+    l1 (float): The length of the first arm segment.
+    l2 (float): The length of the second arm segment.
+
+    Returns:
+    tuple: Two numpy arrays (xs, ys) with the pen position for every angle pair.
+    """
+    import numpy as np  # imported here so streaming, which only needs HOME_ANGLES, starts fast
+
+    shoulder = np.radians(np.asarray(shoulder_angles, dtype=float))
+    elbow = np.radians(np.asarray(elbow_angles, dtype=float) - 90.0)  # Undo servo mapping
+    xs = l1 * np.cos(shoulder) + l2 * np.cos(shoulder + elbow)
+    ys = l1 * np.sin(shoulder) + l2 * np.sin(shoulder + elbow)
+    return xs, ys
+
 def old_compute_joint_angles(x, y, l1, l2):
     """
     Compute the joint angles (thetas) for a 2D planar robotic arm given the end-effector position (x, y)
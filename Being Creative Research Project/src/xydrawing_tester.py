@@ -1,22 +1,36 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import ast
-import random
+from command_generator import read_commands_file
+from svg_to_xy import xy_points_to_strokes
+from xy_to_angles_inverse_kinamatics import forward_kinematics
 
 # --- CONFIGURATION ---
 # NOTE: Adjust BASE_DIR if your main script's BASE_DIR is located differently.
 BASE_DIR = Path(__file__).parent.parent 
 XY_FILE_DIR = BASE_DIR / "data" / "xy_files"
+XY_FILE_STORAGE_DIR = BASE_DIR / "data" / "xy_file_storage"
+COMMAND_FILE_STORAGE_DIR = BASE_DIR / "data" / "command_file_storage"
+PREVIEW_DIR = BASE_DIR / "data" / "preview_storage"
 
-def read_points_file():
+# Arm lengths used to turn command files back into XY (match main.py)
+ARM_L1 = 13.0
+ARM_L2 = 12.5
+
+def read_points_file(xy_file_path=None):
     """
     Reads the list of (x, y) coordinates from a text file.
     
     IMPORTANT: This now assumes the file contains one tuple per line, 
     matching the line-by-line output format of the external script.
+    If no path is given, the first file in /data/xy_files/ is used.
     """
-    xy_file_path = next(XY_FILE_DIR.glob('*'))
+    if xy_file_path is None:
+        xy_file_path = next(XY_FILE_DIR.glob('*'))
     points_list = []
     
     try:
@@ -37,10 +51,81 @@ def read_points_file():
         print(f"Error reading or parsing file {xy_file_path}: {e}")
         return []
 
+def commands_to_strokes(command_list, l1=ARM_L1, l2=ARM_L2):
+    """
+    Rebuilds the pen-down strokes of a command list (as returned by
+    read_commands_file) using forward kinematics.
+
+    Returns:
+        list: One (N, 2) numpy array per stroke.
+    """
+    angles = [c for c in command_list if isinstance(c, tuple) and c != (None, None)]
+    if not angles:
+        return []
+    xs, ys = forward_kinematics([a[0] for a in angles], [a[1] for a in angles], l1, l2)
+
+    strokes = []
+    current_stroke = []
+    last_point = None
+    is_down = False  # The arm homes with the pen up
+    move_idx = 0
+
+    for command in command_list:
+        if command == "PEN DOWN":
+            is_down = True
+            current_stroke = [last_point] if last_point is not None else []
+        elif command == "PEN UP" or command == "END":
+            if is_down and current_stroke:
+                strokes.append(np.array(current_stroke, dtype=float))
+            is_down = False
+            current_stroke = []
+        elif isinstance(command, tuple) and command != (None, None):
+            last_point = (xs[move_idx], ys[move_idx])
+            move_idx += 1
+            if is_down:
+                current_stroke.append(last_point)
+
+    if is_down and current_stroke:
+        strokes.append(np.array(current_stroke, dtype=float))
+    return strokes
+
+
+def _draw_strokes(ax, strokes, title):
+    """
+    Draws all strokes as a single LineCollection with batched vertex and
+    start/end markers.
+    """
+    ax.set_title(title)
+    ax.set_xlabel("X Coordinate")
+    ax.set_ylabel("Y Coordinate")
+    ax.set_aspect('equal', adjustable='datalim')
+    ax.grid(True)
+
+    if not strokes:
+        return
+
+    # Assign a random color to each stroke for easy differentiation
+    # (seeded so previews of the same file always look the same)
+    rng = np.random.default_rng(0)
+    colors = rng.random((len(strokes), 3))
+    ax.add_collection(LineCollection(strokes, colors=colors, linewidths=2))
+
+    all_points = np.concatenate(strokes)
+    starts = np.array([s[0] for s in strokes])
+    ends = np.array([s[-1] for s in strokes])
+
+    # A small marker for every point, plus start/end points for clarity
+    ax.scatter(all_points[:, 0], all_points[:, 1], s=4, c='black', zorder=2)
+    ax.scatter(starts[:, 0], starts[:, 1], s=25, marker='o', c='green', label='Start Point', zorder=3)
+    ax.scatter(ends[:, 0], ends[:, 1], s=25, marker='x', c='red', label='End Point', zorder=3)
+    ax.autoscale_view()
+    ax.legend(loc='best')
+
+
 def plot_xy_points(points_list, title="SVG Path Visualization"):
     """
-    Plots the list of (x, y) coordinates, handling (None, None) as path breaks.
-    
+    Plots the list of (x, y) coordinates, handling (None, None) as pen up/down toggles.
+
     Args:
         points_list (list): The list of (x, y) coordinates with (None, None) separators.
         title (str): The title for the plot.
@@ -50,63 +135,71 @@ def plot_xy_points(points_list, title="SVG Path Visualization"):
         return
 
     plt.figure(figsize=(8, 8))
-    plt.title(title)
-    plt.xlabel("X Coordinate")
-    plt.ylabel("Y Coordinate")
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.grid(True)
-    
-    # Track continuous segments
-    current_stroke = []
-
-    for point in points_list:
-        # Check for (None, None) or if the element is not a tuple (safety check, should be a tuple)
-        if point == (None, None) or not isinstance(point, tuple):
-            # End of a stroke/segment
-            if current_stroke:
-                # Convert list of tuples to numpy arrays for plotting
-                xs = [p[0] for p in current_stroke]
-                ys = [p[1] for p in current_stroke]
-                
-                # Assign a random color to each stroke for easy differentiation
-                color = (random.random(), random.random(), random.random())
-                
-                # Plot the stroke as a connected line, with a small marker for every point
-                plt.plot(xs, ys, color=color, linewidth=2, marker='o', markersize=2)
-                
-                # Plot the start/end points of the actual drawing path for clarity
-                # Ensure the labels only appear once in the legend
-                start_label = 'Start Point' if not any('Start Point' in L.get_label() for L in plt.gca().lines) else ""
-                end_label = 'End Point' if not any('End Point' in L.get_label() for L in plt.gca().lines) else ""
-
-                if len(current_stroke) > 0:
-                    # Plot start and end with different markers/colors for clarity
-                    plt.plot(xs[0], ys[0], 'o', color='green', markersize=5, label=start_label)
-                    plt.plot(xs[-1], ys[-1], 'x', color='red', markersize=5, label=end_label)
-
-            current_stroke = []
-        else:
-            # Add valid point to the current stroke
-            current_stroke.append(point)
-            
-    # Add legend to clarify start/end points
-    if any(L.get_label() for L in plt.gca().lines):
-        # Filter out stroke line labels and keep only unique start/end labels
-        handles, labels = plt.gca().get_legend_handles_labels()
-        unique_legend = {}
-        for h, l in zip(handles, labels):
-            if l:
-                unique_legend[l] = h
-        
-        legend_handles = list(unique_legend.values())
-        legend_labels = list(unique_legend.keys())
-        
-        if legend_labels:
-            plt.legend(legend_handles, legend_labels, loc='best')
+    _draw_strokes(plt.gca(), xy_points_to_strokes(points_list), title)
 
     # Show the plot
     plt.show()
 
+
+def render_strokes(strokes, out_path, title="SVG Path Visualization"):
+    """
+    Renders strokes headless to an image file. The format (PNG, SVG, ...) is
+    taken from the suffix of out_path.
+    """
+    # Build the figure without pyplot so no GUI backend is ever touched
+    fig = Figure(figsize=(8, 8))
+    _draw_strokes(fig.add_subplot(), strokes, title)
+    fig.savefig(out_path)
+    return out_path
+
+
+def render_preview_file(file_path, out_dir=PREVIEW_DIR, fmt="png", l1=ARM_L1, l2=ARM_L2):
+    """
+    Renders a preview of one xy file or command file. Files whose name starts
+    with "commands_" are converted back to XY with forward kinematics.
+    """
+    file_path = Path(file_path)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        items = read_commands_file(file_path)
+    except OSError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return None
+
+    if file_path.name.startswith("commands_"):
+        strokes = commands_to_strokes(items, l1, l2)
+    else:
+        strokes = xy_points_to_strokes([p for p in items if isinstance(p, tuple)])
+
+    out_path = out_dir / f"{file_path.name}.{fmt}"
+    return render_strokes(strokes, out_path, title=f"Preview of {file_path.name}")
+
+
+def render_preview_directory(src_dir=XY_FILE_STORAGE_DIR, out_dir=PREVIEW_DIR, fmt="png", workers=None, l1=ARM_L1, l2=ARM_L2):
+    """
+    Renders a preview for every file in src_dir (e.g. xy_file_storage or
+    command_file_storage) in parallel, one process per file.
+
+    Returns:
+        list: Paths of the rendered previews.
+    """
+    files = sorted(p for p in Path(src_dir).iterdir() if p.is_file())
+    rendered = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_preview_file, f, out_dir, fmt, l1, l2): f for f in files}
+        for future in as_completed(futures):
+            try:
+                out_path = future.result()
+            except Exception as e:
+                print(f"Error rendering {futures[future].name}: {e}")
+                continue
+            if out_path is not None:
+                rendered.append(out_path)
+    print(f"Rendered {len(rendered)}/{len(files)} previews into {out_dir}")
+    return sorted(rendered)
+
 if __name__ == '__main__':
     # 2. Read the points from the file
     points = read_points_file()